@@ -0,0 +1,176 @@
+"""
+批量渲染：按日期范围（或任务列表）在进程池中并行渲染并压缩，每个日期输出一个 .bin。
+
+数据来自按日期缓存的解析结果（daycache.py），缺失的日期先预取；
+每个工作进程启动时编译一次任务用到的布局（字体、静态底图），之后的任务直接复用。
+
+一言与 script.py 相同，只在工作日显示：联网时为每个工作日的任务各抓取一条，
+也可以用 --hitokoto 或任务中的 hitokoto 字段指定。--offline 且未指定时一言留空，
+输出与当天 script.py 渲染的帧不同。
+
+用法：
+    python batch.py --start 2025-01-01 --days 31 --out frames
+    python batch.py --jobs jobs.json
+
+jobs.json 为任务列表，每项形如：
+    {"date": "2025-01-04", "output": "frames/panel-a.bin", "threshold": 128, "encoding": "rle",
+     "layout": "7.5in", "hitokoto": "..."}
+"""
+
+import argparse
+import datetime
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import script
+from daycache import DayCache
+from layout import DEFAULT_LAYOUT, get_plan
+
+OUTPUT_DIR = "frames"
+
+
+def _init_worker(plans):
+    # 每个工作进程编译一次任务用到的布局（加载字体、绘制底图），之后的渲染直接复用
+    for plan in plans:
+        get_plan(*plan)
+
+
+def _plan_args(job):
+    return (
+        job.get("layout") or DEFAULT_LAYOUT,
+        job.get("glyph_atlas", False),
+        job.get("palette", False),
+    )
+
+
+def render_job(job):
+    """
+    渲染并压缩单个任务（在工作进程中执行）。
+    :param job: dict，包含 date、output、day_data，可选 hitokoto、threshold、encoding、layout、
+                glyph_atlas、palette
+    :return: (输出路径, 字节数)
+    """
+    day = datetime.date.fromisoformat(job["date"])
+    plan = get_plan(*_plan_args(job))
+    img = plan.render_day(job["day_data"], job.get("hitokoto"), day)
+    data = script.image_to_compressed_binary(
+        img, threshold=job.get("threshold", 128), encoding=job.get("encoding")
+    )
+    script.write_file_atomic(job["output"], data)
+    return job["output"], len(data)
+
+
+def range_jobs(start, days, out_dir=OUTPUT_DIR, encoding=None):
+    """把日期范围展开为任务列表，每天输出 {out_dir}/{date}.bin。"""
+    return [
+        {
+            "date": day.isoformat(),
+            "output": os.path.join(out_dir, f"{day.isoformat()}.bin"),
+            "encoding": encoding,
+        }
+        for day in (start + datetime.timedelta(days=i) for i in range(days))
+    ]
+
+
+def attach_day_data(jobs, cache, prefetch=True):
+    """
+    为每个任务附上当日数据，缺失的日期先预取。
+    :return: 数据齐全的任务列表（仍缺数据的日期会被跳过并提示）
+    """
+    days = sorted({datetime.date.fromisoformat(job["date"]) for job in jobs})
+    if prefetch:
+        session = script.create_session()
+        try:
+            for day in cache.missing(days):
+                script.prefetch_days(day, 1, cache, session)
+        finally:
+            session.close()
+
+    ready = []
+    for job in jobs:
+        day_data = cache.get(datetime.date.fromisoformat(job["date"]))
+        if day_data is None:
+            print(f"缺少数据，跳过：{job['date']}")
+            continue
+        ready.append({**job, "day_data": day_data})
+    return ready
+
+
+def attach_hitokoto(jobs, session=None):
+    """
+    为未指定 hitokoto 的工作日任务各抓取一条一言（周末不显示一言，无需请求）。
+    抓取失败的任务一言留空，与 script.py 抓取失败时相同。
+    """
+    pending = {
+        f"hitokoto-{i}": job
+        for i, job in enumerate(jobs)
+        if "hitokoto" not in job
+        and datetime.date.fromisoformat(job["date"]).weekday() not in [5, 6]
+    }
+    if not pending:
+        return
+    timeouts = {name: script.FETCH_TIMEOUTS["hitokoto"] for name in pending}
+    pages = script.fetch_sources(
+        {name: script.URL_HITOKOTO for name in pending}, session, timeouts
+    )
+    for name, job in pending.items():
+        job["hitokoto"] = pages[name]
+
+
+def render_batch(jobs, workers=None, cache=None, prefetch=True):
+    """
+    在进程池中并行渲染所有任务。
+    :param jobs: 任务列表（见 range_jobs）
+    :param workers: 进程数，默认 CPU 核数
+    :param cache: DayCache，默认 ./cache
+    :param prefetch: 是否联网补齐缺失日期的数据和工作日的一言
+    :return: [(输出路径, 字节数)]
+    """
+    jobs = attach_day_data(jobs, cache or DayCache(), prefetch)
+    if prefetch:
+        attach_hitokoto(jobs)
+    elif any("hitokoto" not in job for job in jobs):
+        print("离线模式：未指定一言的工作日帧一言留空")
+    for job in jobs:
+        os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+
+    results = []
+    plans = sorted({_plan_args(job) for job in jobs})
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(plans,)
+    ) as pool:
+        for output, size in pool.map(render_job, jobs, chunksize=4):
+            print(f"已生成：{output}（{size} 字节）")
+            results.append((output, size))
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="批量渲染日历帧")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="起始日期 YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=30, help="天数")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="输出目录")
+    parser.add_argument("--jobs", help="任务列表 JSON 文件，代替 --start/--days")
+    parser.add_argument("--encoding", choices=["raw", "rle"], help="输出带版本头的帧")
+    parser.add_argument("--workers", type=int, default=None, help="进程数")
+    parser.add_argument("--offline", action="store_true", help="只使用缓存数据，不联网预取")
+    parser.add_argument("--hitokoto", help="所有工作日使用的一言，代替联网抓取")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # 字体、素材和缓存的相对路径以仓库目录为准
+    os.chdir(script.BASE_DIR)
+    args = parse_args()
+    if args.jobs:
+        with open(args.jobs, encoding="utf-8") as f:
+            jobs = json.load(f)
+    else:
+        jobs = range_jobs(
+            args.start or datetime.date.today(), args.days, args.out, args.encoding
+        )
+    if args.hitokoto is not None:
+        for job in jobs:
+            job.setdefault("hitokoto", args.hitokoto)
+    render_batch(jobs, workers=args.workers, prefetch=not args.offline)
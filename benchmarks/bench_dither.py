@@ -0,0 +1,47 @@
+"""
+三色量化基准：原逐像素灰度二值化 vs. packer 的阈值 / 最近颜色 / 有序抖动 / 误差扩散。
+
+测试图为带红色区域的平滑渐变（近似照片或插画），另报告每种方式输出的红色像素占比：
+灰度阈值会把所有红色都变成黑或白，三色量化则保留下来。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_dither
+"""
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.bench_pack import PANEL_SIZES, best_of, legacy_pack
+from packer import DITHER_MODES, pack_image, quantize
+
+# 对照组：(名称, dither)，None 为现有的灰度阈值二值化
+MODES = [("threshold", None)] + [(mode, mode) for mode in DITHER_MODES]
+
+
+def make_photo(width, height):
+    """水平灰度渐变，叠加一个由中心向外变淡的红色圆斑。"""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    gray = 255 * x / max(width - 1, 1)
+    distance = np.hypot(x - width * 0.6, y - height * 0.5) / (min(width, height) * 0.4)
+    red = np.clip(1 - distance, 0, 1)
+    rgb = np.stack([gray + (255 - gray) * red, gray * (1 - red), gray * (1 - red)], axis=-1)
+    return Image.fromarray(rgb.round().astype(np.uint8), "RGB")
+
+
+def main():
+    print(f"{'size':>10} {'mode':>16} {'time(ms)':>9} {'vs legacy':>10} {'red px':>7}")
+    for width, height in PANEL_SIZES:
+        img = make_photo(width, height)
+        assert legacy_pack(img) == pack_image(img), "输出不一致"
+        t_legacy = best_of(lambda: legacy_pack(img), 1)
+        print(f"{width}x{height:<5} {'legacy loop':>16} {t_legacy * 1000:9.1f} {'':>10} {0:7.1%}")
+        for name, dither in MODES:
+            t = best_of(lambda: pack_image(img, dither=dither), 10)
+            red = (quantize(img, dither=dither) == 0b10).mean()
+            print(
+                f"{'':>10} {name:>16} {t * 1000:9.2f} {t_legacy / t:9.0f}x {red:7.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+字体加载基准测试：每帧重新加载字体、编译布局（原行为）vs. 进程级字体注册表和编译好的渲染计划。
+
+fonts.get_font 报告单个字体首次加载与命中注册表的耗时，layout.get_plan 报告
+编译布局（加载布局用到的全部字体、绘制静态底图）的首次与缓存耗时。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_fonts
+"""
+
+import functools
+import time
+
+from benchmarks.bench_parse import read_fixture
+from parsers import parse_huangli_html, parse_wannianrili_html
+
+FRAMES = 20
+
+
+def load_day_data():
+    data = parse_huangli_html(read_fixture("huangli.html"))
+    data["today_text"] = parse_wannianrili_html(read_fixture("wannianrili.html"))
+    data["hitokoto"] = read_fixture("hitokoto.txt")
+    return data
+
+
+def render(data):
+    from layout import DEFAULT_LAYOUT, get_plan
+
+    hitokoto = data["hitokoto"]
+    return get_plan(DEFAULT_LAYOUT).render_day(data, hitokoto)
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    data = load_day_data()
+    import fonts
+    from layout import DEFAULT_LAYOUT, get_plan, load_layout
+
+    font_spec = load_layout(DEFAULT_LAYOUT)["fonts"]["medium"]
+    fonts.clear_font_cache()
+    load_font = functools.partial(fonts.get_font, font_spec["path"], font_spec["size"])
+    t_cold = timed(load_font)
+    t_warm = min(timed(load_font) for _ in range(FRAMES))
+    print(f"get_font: first call {t_cold * 1000:.2f} ms, cached {t_warm * 1000:.3f} ms")
+
+    fonts.clear_font_cache()
+    get_plan.cache_clear()
+    compile_plan = functools.partial(get_plan, DEFAULT_LAYOUT)
+    t_cold = timed(compile_plan)
+    t_warm = min(timed(compile_plan) for _ in range(FRAMES))
+    print(f"get_plan: first call {t_cold * 1000:.2f} ms, cached {t_warm * 1000:.3f} ms")
+
+    # 原行为：每帧都重新加载字体、重新测量字符串、重新绘制底图
+    uncached = []
+    for _ in range(FRAMES):
+        fonts.clear_font_cache()
+        get_plan.cache_clear()
+        uncached.append(timed(lambda: render(data)))
+
+    # 注册表与渲染计划：字体、宽度缓存和底图在帧之间复用
+    cached = [timed(lambda: render(data)) for _ in range(FRAMES)]
+
+    per_uncached = sorted(uncached)[FRAMES // 2]
+    per_cached = sorted(cached)[FRAMES // 2]
+    print(f"per frame (median of {FRAMES}):")
+    print(f"  reload fonts every frame: {per_uncached * 1000:.2f} ms")
+    print(f"  compiled render plan:     {per_cached * 1000:.2f} ms")
+    print(f"  saved per frame:          {(per_uncached - per_cached) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
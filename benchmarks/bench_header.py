@@ -0,0 +1,100 @@
+"""
+C 头文件生成基准：原逐字节 f-string + 字符串 += 实现 vs. compress.py 批量格式化实现。
+
+以 1304x984 测试帧为输入，分别测量“已打包字节 -> 头文件”的格式化耗时，
+以及 bmp_to_c_header_binarize 端到端（读 BMP、打包、写头文件）的耗时，
+并校验两者生成的头文件逐字节相同。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_header
+"""
+
+import os
+import tempfile
+import time
+
+from benchmarks.bench_pack import legacy_pack, make_frame
+from compress import bmp_to_c_header_binarize, write_c_array_body
+from packer import pack_image
+
+SIZE = (1304, 984)
+
+
+def legacy_header(compressed_data, width, height, output_c_name="compressed_image"):
+    """原 bmp_to_c_header_binarize 中的头文件拼接部分，作为对照组。"""
+    header_content = f"#ifndef {output_c_name.upper()}_H\n"
+    header_content += f"#define {output_c_name.upper()}_H\n\n"
+    header_content += f"const unsigned char {output_c_name}[] = {{\n"
+    for i, byte in enumerate(compressed_data):
+        if i % 12 == 0:
+            header_content += "    "
+        header_content += f"0x{byte:02X}, "
+        if (i + 1) % 12 == 0:
+            header_content += "\n"
+    if len(compressed_data) % 12 != 0:
+        header_content += "\n"
+    header_content += "};\n\n"
+    header_content += f"const int {output_c_name}_width = {width};\n"
+    header_content += f"const int {output_c_name}_height = {height};\n\n"
+    header_content += "#endif\n"
+    return header_content
+
+
+def legacy_to_file(image_path, header_file_name):
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+    with open(header_file_name, "w", encoding="utf-8") as header_file:
+        header_file.write(legacy_header(legacy_pack(img), *img.size))
+
+
+def body_to_file(packed, header_file_name):
+    with open(header_file_name, "w", encoding="utf-8", buffering=1 << 16) as header_file:
+        write_c_array_body(header_file, [packed])
+
+
+def legacy_body_to_file(packed, header_file_name):
+    with open(header_file_name, "w", encoding="utf-8") as header_file:
+        header_file.write(legacy_header(packed, *SIZE))
+
+
+def best_of(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    width, height = SIZE
+    with tempfile.TemporaryDirectory() as tmp:
+        bmp = os.path.join(tmp, "frame.bmp")
+        legacy_h = os.path.join(tmp, "legacy.h")
+        fast_h = os.path.join(tmp, "fast.h")
+        make_frame(width, height).save(bmp)
+
+        from PIL import Image
+
+        with Image.open(bmp) as img:
+            packed = pack_image(img)
+
+        t_legacy_fmt = best_of(lambda: legacy_body_to_file(packed, legacy_h))
+        t_fast_fmt = best_of(lambda: body_to_file(packed, fast_h))
+
+        t_legacy = best_of(lambda: legacy_to_file(bmp, legacy_h), 1)
+        t_fast = best_of(lambda: bmp_to_c_header_binarize(bmp, fast_h), 3)
+        with open(legacy_h) as a, open(fast_h) as b:
+            assert a.read() == b.read(), "头文件内容不一致"
+        size_kb = os.path.getsize(fast_h) / 1024
+
+    print(f"input: {width}x{height}, {len(packed)} bytes packed, header {size_kb:.0f} KB")
+    print(f"{'stage':>12} {'legacy(ms)':>11} {'fast(ms)':>9} {'speedup':>8}")
+    for stage, old, new in (("format", t_legacy_fmt, t_fast_fmt), ("end-to-end", t_legacy, t_fast)):
+        print(f"{stage:>12} {old * 1000:11.1f} {new * 1000:9.1f} {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+打包引擎基准测试：逐像素实现 vs. packer 向量化实现。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_pack
+"""
+
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+from packer import COLOR_MAP, pack_image
+
+# 常见墨水屏分辨率
+PANEL_SIZES = [(400, 300), (800, 480), (1304, 984)]
+
+
+def legacy_pack(img, threshold=128):
+    """原 bmp_to_compressed_binary 中的逐像素实现，作为对照组。"""
+    img = img.convert("RGB")
+    width, height = img.size
+    pixels = img.load()
+
+    for y in range(height):
+        for x in range(width):
+            color = pixels[x, y]
+            if color not in COLOR_MAP:
+                gray = int(0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2])
+                pixels[x, y] = (255, 255, 255) if gray >= threshold else (0, 0, 0)
+
+    compressed_data = []
+    current_byte = 0
+    bit_position = 0
+    for y in range(height):
+        for x in range(width):
+            current_byte |= COLOR_MAP[pixels[x, y]] << (6 - bit_position)
+            bit_position += 2
+            if bit_position == 8:
+                compressed_data.append(current_byte)
+                current_byte = 0
+                bit_position = 0
+    if bit_position > 0:
+        compressed_data.append(current_byte)
+    return bytes(compressed_data)
+
+
+def make_frame(width, height, seed=0):
+    """生成一张带抗锯齿文字和色块的测试帧，近似真实日历画面。"""
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, width, height // 6], fill=(255, 0, 0))
+    for _ in range(width * height // 2000):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.text((x, y), "calendar", fill=(0, 0, 0))
+    draw.ellipse([width // 8, height // 4, width // 4, height // 2], fill=(0, 0, 0))
+    return img.resize((width + 1, height + 1)).resize((width, height))
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'size':>10} {'legacy(ms)':>12} {'numpy(ms)':>10} {'speedup':>8}")
+    for width, height in PANEL_SIZES:
+        img = make_frame(width, height)
+        assert legacy_pack(img) == pack_image(img), "输出不一致"
+        t_legacy = best_of(lambda: legacy_pack(img), 3)
+        t_numpy = best_of(lambda: pack_image(img), 20)
+        print(
+            f"{width}x{height:<5} {t_legacy * 1000:12.1f} {t_numpy * 1000:10.2f} "
+            f"{t_legacy / t_numpy:7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
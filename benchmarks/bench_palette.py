@@ -0,0 +1,50 @@
+"""
+调色板渲染基准：RGB 画布 + 颜色匹配/二值化打包 vs. 三色调色板（P 模式）画布 + 索引查表打包。
+
+对每种面板布局报告画布内存、渲染耗时、打包耗时，以及打包结果与 RGB 方式
+不同像素的个数（P 模式不做抗锯齿，文字边缘会有少量差异）。
+P 模式下 FreeType 的单色栅格化比灰度更慢，因此另列出 P 模式 + 字形图集（glyphatlas.py）。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_palette
+"""
+
+import datetime
+
+from benchmarks.bench_fonts import load_day_data
+from benchmarks.bench_rle import best_of
+from layout import available_layouts, get_plan
+from packer import pack_image, quantize
+
+DAY = datetime.date(2025, 1, 6)
+# 渲染方式：(名称, palette, glyph_atlas)
+MODES = [("RGB", False, False), ("P", True, False), ("P+atlas", True, True)]
+
+
+def main():
+    data = load_day_data()
+    hitokoto = data.pop("hitokoto")
+
+    print(
+        f"{'layout':>7} {'mode':>8} {'canvas(KB)':>11} {'render(ms)':>11} "
+        f"{'pack(ms)':>9} {'total(ms)':>10} {'diff px':>8}"
+    )
+    for name in available_layouts():
+        reference = None
+        for mode, palette, glyph_atlas in MODES:
+            plan = get_plan(name, glyph_atlas, palette)
+            img = plan.render_day(data, hitokoto, DAY)
+            codes = quantize(img)
+            if reference is None:
+                reference = codes
+            t_render = best_of(lambda: plan.render_day(data, hitokoto, DAY), 20)
+            t_pack = best_of(lambda: pack_image(img), 20)
+            print(
+                f"{name:>7} {mode:>8} {len(img.tobytes()) / 1024:11.0f} "
+                f"{t_render * 1000:11.2f} {t_pack * 1000:9.2f} "
+                f"{(t_render + t_pack) * 1000:10.2f} {int((codes != reference).sum()):8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+页面解析基准测试：BeautifulSoup(html.parser) vs. lxml（parsers.py）。
+
+使用 benchmarks/fixtures 中保存的页面，离线运行；先校验两种实现提取的字段
+完全一致，再比较耗时和内存（在独立子进程中构建 N 棵文档树，统计 RSS 增长）。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_parse
+"""
+
+import multiprocessing
+import os
+import resource
+import time
+
+from bs4 import BeautifulSoup
+
+from parsers import parse_huangli_html, parse_wannianrili_html
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+TREES_FOR_MEMORY = 20
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def parse_bs4(huangli_html, wannianrili_html):
+    # 延迟导入：script.py 在导入时会切换工作目录
+    from script import parse_huangli_data, parse_wannianrili_data
+
+    data = parse_huangli_data(BeautifulSoup(huangli_html, "html.parser"))
+    data["today_text"] = parse_wannianrili_data(
+        BeautifulSoup(wannianrili_html, "html.parser")
+    )
+    return data
+
+
+def parse_lxml(huangli_html, wannianrili_html):
+    data = parse_huangli_html(huangli_html)
+    data["today_text"] = parse_wannianrili_html(wannianrili_html)
+    return data
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _rss_kb():
+    # 当前常驻内存（Linux），比 ru_maxrss 更能反映新增分配
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def _tree_memory(backend, html, queue):
+    """子进程：构建 TREES_FOR_MEMORY 棵文档树并保留，返回 RSS 增长（KB）。"""
+    import lxml.html
+
+    build = {
+        "bs4": lambda: BeautifulSoup(html, "html.parser"),
+        "lxml": lambda: lxml.html.fromstring(html),
+    }[backend]
+    build()  # 预热，排除首次调用的一次性开销
+    before = _rss_kb()
+    trees = [build() for _ in range(TREES_FOR_MEMORY)]
+    after = _rss_kb()
+    queue.put((after - before) / len(trees))
+    del trees
+
+
+def tree_memory(backend, html):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_tree_memory, args=(backend, html, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    huangli_html = read_fixture("huangli.html")
+    wannianrili_html = read_fixture("wannianrili.html")
+
+    expected = parse_bs4(huangli_html, wannianrili_html)
+    actual = parse_lxml(huangli_html, wannianrili_html)
+    assert expected == actual, f"字段不一致：\n{expected}\n{actual}"
+    print("fields identical:", ", ".join(sorted(actual)))
+
+    t_bs4 = best_of(lambda: parse_bs4(huangli_html, wannianrili_html), 20)
+    t_lxml = best_of(lambda: parse_lxml(huangli_html, wannianrili_html), 100)
+    print(f"{'backend':>8} {'time(ms)':>9} {'tree RSS(KB)':>13}")
+    for backend, elapsed, html in (
+        ("bs4", t_bs4, huangli_html),
+        ("lxml", t_lxml, huangli_html),
+    ):
+        print(f"{backend:>8} {elapsed * 1000:9.2f} {tree_memory(backend, html):13.0f}")
+    print(f"speedup: {t_bs4 / t_lxml:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+帧编码基准：原始 2 位打包 vs. PackBits 行程编码的体积与编解码耗时。
+
+对工作日/周末两种日历画面和周末素材图做编码、解码往返校验，再报告压缩比。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_rle
+"""
+
+import datetime
+import time
+
+from benchmarks.bench_fonts import load_day_data
+from frameformat import decode_frame, encode_frame
+from packer import pack_image
+
+ASSET = "assets/weekend.bmp"
+
+
+def frames():
+    from PIL import Image
+
+    import script
+
+    data = load_day_data()
+    days = {"weekday": datetime.date(2025, 1, 6), "weekend": datetime.date(2025, 1, 4)}
+    for name, day in days.items():
+        yield name, script.create_calendar_image(**data, day=day)
+    with Image.open(ASSET) as img:
+        yield "asset", img.convert("RGB")
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(
+        f"{'frame':>8} {'size':>9} {'raw':>7} {'rle':>7} {'ratio':>6} "
+        f"{'enc(ms)':>8} {'dec(ms)':>8}"
+    )
+    for name, img in frames():
+        packed = pack_image(img)
+        width, height = img.size
+        raw = encode_frame(packed, width, height, "raw")
+        rle = encode_frame(packed, width, height, "rle")
+        assert decode_frame(raw) == (width, height, packed)
+        assert decode_frame(rle) == (width, height, packed)
+        t_enc = best_of(lambda: encode_frame(packed, width, height, "rle"), 20)
+        t_dec = best_of(lambda: decode_frame(rle), 20)
+        print(
+            f"{name:>8} {width:>4}x{height:<4} {len(raw):>7} {len(rle):>7} "
+            f"{len(raw) / len(rle):5.1f}x {t_enc * 1000:8.2f} {t_dec * 1000:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
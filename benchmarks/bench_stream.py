@@ -0,0 +1,55 @@
+"""
+流式打包基准：整帧打包（pack_image）vs. 逐条带打包（iter_packed）。
+
+报告不同分辨率下打包过程的峰值内存（tracemalloc，含 numpy 数组）和耗时。
+script.image_to_compressed_binary 写文件时按条带打包并逐条带写入（无帧头时）。
+
+帧服务器不做流式发送：推送端口发送的是已打包好、常驻内存的帧；按屏渲染的应答头中
+帧版本是整帧的 CRC32，必须整帧打包完成后才能发出第一个字节。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_stream
+"""
+
+import tracemalloc
+
+from benchmarks.bench_pack import best_of, make_frame
+from packer import iter_packed, pack_image
+
+PANEL_SIZES = [(400, 300), (800, 480), (1304, 984), (2608, 1968)]
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def consume(chunks):
+    for _ in chunks:
+        pass
+
+
+def main():
+    print(
+        f"{'size':>10} {'peak full(KB)':>14} {'peak stream(KB)':>16} "
+        f"{'full(ms)':>9} {'stream(ms)':>11}"
+    )
+    for width, height in PANEL_SIZES:
+        img = make_frame(width, height)
+        assert b"".join(iter_packed(img)) == pack_image(img)
+        peak_full = peak_memory(lambda: pack_image(img))
+        peak_stream = peak_memory(lambda: consume(iter_packed(img)))
+        t_full = best_of(lambda: pack_image(img), 5)
+        t_stream = best_of(lambda: consume(iter_packed(img)), 5)
+        print(
+            f"{width}x{height:<5} {peak_full / 1024:14.0f} {peak_stream / 1024:16.0f} "
+            f"{t_full * 1000:9.2f} {t_stream * 1000:11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
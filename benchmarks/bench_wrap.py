@@ -0,0 +1,100 @@
+"""
+wrap_text_cn 基准测试：逐字重新测量整行（原实现）vs. 增量行宽（缓存字宽 + 字距修正）。
+
+先在多种字体、字号、宽度和文本上校验两者的换行位置完全一致，再比较耗时。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.bench_wrap
+"""
+
+import random
+import time
+
+from benchmarks.bench_parse import read_fixture
+
+FONT_PATH = "font/hu.ttf"
+CJK = "天地玄黄宇宙洪荒日月盈昃辰宿列张寒来暑往秋收冬藏闰余成岁律吕调阳云腾致雨露结为霜"
+ACTIVITIES = "祭祀 祈福 求嗣 开光 出行 解除 伐木 拆卸 修造 动土 上梁 嫁娶 安葬 入宅 作灶"
+
+
+def legacy_wrap_text_cn(text, font, max_width):
+    """原实现：每加一个字符就重新测量整行。"""
+    wrapped_lines = []
+    line = ""
+    for char in text:
+        line_width = font.getlength(line + char)
+        if line_width <= max_width and char != "\n":
+            line += char
+        else:
+            wrapped_lines.append(line.strip())
+            if char != "\n":
+                line = char
+            else:
+                line = ""
+    if line:
+        wrapped_lines.append(line.strip())
+    return wrapped_lines
+
+
+def corpus(rng):
+    texts = [
+        read_fixture("hitokoto.txt").strip(),
+        ACTIVITIES,
+        "AVATAR Wave To: 'quoted' text, kerning pairs AV Ty Yo LT.",
+        "第一行\n第二行\n\n第四行 带空格  和标点，。！？",
+    ]
+    for length in (50, 200, 1000):
+        texts.append("".join(rng.choice(CJK + "，。 ") for _ in range(length)))
+    return texts
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    import fonts
+    from script import wrap_text_cn
+
+    rng = random.Random(0)
+    texts = corpus(rng)
+
+    # 一致性校验
+    checked = 0
+    for size in (14, 20, 40):
+        font = fonts.get_font(FONT_PATH, size)
+        for max_width in (60, 100, 320, 760):
+            for text in texts:
+                assert legacy_wrap_text_cn(text, font, max_width) == wrap_text_cn(
+                    text, font, max_width
+                ), (size, max_width, text[:20])
+                checked += 1
+    font = fonts.default_font()
+    for text in texts:
+        assert legacy_wrap_text_cn(text, font, 100) == wrap_text_cn(text, font, 100)
+        checked += 1
+    print(f"identical wrap points: {checked} cases")
+
+    font = fonts.get_font(FONT_PATH, 20)
+    print(f"{'chars':>6} {'width':>6} {'legacy(ms)':>11} {'cold(ms)':>9} {'warm(ms)':>9}")
+    for length in (100, 1000, 5000):
+        text = "".join(rng.choice(CJK) for _ in range(length))
+        for max_width in (320, 760):
+            t_legacy = best_of(lambda: legacy_wrap_text_cn(text, font, max_width), 3)
+            fonts.clear_font_cache()
+            font = fonts.get_font(FONT_PATH, 20)
+            t_cold = best_of(lambda: wrap_text_cn(text, font, max_width), 1)
+            t_warm = best_of(lambda: wrap_text_cn(text, font, max_width), 5)
+            print(
+                f"{length:>6} {max_width:>6} {t_legacy * 1000:11.2f} "
+                f"{t_cold * 1000:9.2f} {t_warm * 1000:9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
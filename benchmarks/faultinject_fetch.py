@@ -0,0 +1,152 @@
+"""
+并发抓取（script.fetch_sources）的故障注入检查：在本机启动一个 HTTP 桩服务器，
+用 benchmarks/fixtures 中的页面代替黄历、万年历和一言，每个请求固定延迟 DELAY 秒，
+检查：
+
+- 三个数据源并发抓取，总耗时接近单个请求而不是三者之和；
+- 返回 500、连接被拒绝、超过超时的数据源结果为 None，其他数据源不受影响；
+- script.main 的回退：黄历失败时放弃渲染，万年历或一言失败时照常生成帧。
+
+全程离线，不访问真实网站。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.faultinject_fetch
+"""
+
+import contextlib
+import io
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import script
+from benchmarks.bench_parse import read_fixture
+
+DELAY = 0.3  # 桩服务器每个请求的延迟（秒）
+SLOW_DELAY = 2.0  # “慢”数据源的延迟（秒），超过 SLOW_TIMEOUT
+SLOW_TIMEOUT = 1.0
+
+PAGES = {
+    "/huangli": "huangli.html",
+    "/wannianrili": "wannianrili.html",
+    "/hitokoto": "hitokoto.txt",
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    /huangli、/wannianrili、/hitokoto 延迟 DELAY 秒后返回对应的 fixture；
+    /slow 延迟 SLOW_DELAY 秒；/error 返回 500。
+    """
+
+    def do_GET(self):
+        if self.path == "/error":
+            time.sleep(DELAY)
+            self.send_error(500)
+            return
+        time.sleep(SLOW_DELAY if self.path == "/slow" else DELAY)
+        name = PAGES.get(self.path, "hitokoto.txt")
+        body = read_fixture(name).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except ConnectionError:
+            pass  # 客户端已超时断开
+
+    def log_message(self, format, *args):
+        pass
+
+
+def refused_url():
+    """一个没有监听的本地端口，连接会被立即拒绝。"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/"
+
+
+def timed_fetch(urls, timeouts=None):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pages = script.fetch_sources(urls, timeouts=timeouts)
+    return pages, time.perf_counter() - start
+
+
+def run_main(base, **overrides):
+    """
+    把 script.main 的三个数据源（指定日期的黄历、万年历页面和一言）指向桩服务器，
+    可单独替换某个，返回 main 的结果。
+    """
+    urls = {
+        "URL_HUANGLI_DATE": f"{base}/huangli",
+        "URL_WANNIANRILI_DATE": f"{base}/wannianrili",
+        "URL_HITOKOTO": f"{base}/hitokoto",
+    }
+    urls.update(overrides)
+    saved = {name: getattr(script, name) for name in urls}
+    try:
+        for name, url in urls.items():
+            setattr(script, name, url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return script.main(image_path=None, binary_path=None, use_cache=False)
+    finally:
+        for name, url in saved.items():
+            setattr(script, name, url)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    good = {name: f"{base}/{name}" for name in ["huangli", "wannianrili", "hitokoto"]}
+    expected = {name: read_fixture(PAGES[f"/{name}"]) for name in good}
+
+    results = []
+
+    def check(name, urls, expect_none, max_time, timeouts=None):
+        pages, elapsed = timed_fetch(urls, timeouts)
+        ok = elapsed < max_time and all(
+            (pages[source] is None) if source in expect_none else pages[source] == expected[source]
+            for source in urls
+        )
+        got = {source: "None" if text is None else "ok" for source, text in pages.items()}
+        results.append((name, ok, elapsed, got))
+
+    # 并发：三个 DELAY 秒的请求，总耗时应远小于 3 * DELAY
+    check("concurrent", good, [], DELAY * 2)
+    check("http-500", dict(good, wannianrili=f"{base}/error"), ["wannianrili"], DELAY * 2)
+    check("refused", dict(good, hitokoto=refused_url()), ["hitokoto"], DELAY * 2)
+    check(
+        "slow-timeout",
+        dict(good, huangli=f"{base}/slow"),
+        ["huangli"],
+        SLOW_TIMEOUT + DELAY * 2,
+        dict(script.FETCH_TIMEOUTS, huangli=SLOW_TIMEOUT),
+    )
+
+    print(f"{'scenario':>22} {'result':>6} {'time(s)':>8}  sources")
+    for name, ok, elapsed, got in results:
+        print(f"{name:>22} {'PASS' if ok else 'FAIL':>6} {elapsed:8.2f}  {got}")
+
+    # script.main 的回退行为（周末 main 不请求一言，最后一项只在工作日有意义）
+    main_checks = [
+        ("main", run_main(base) is not None),
+        ("main huangli-500", run_main(base, URL_HUANGLI_DATE=f"{base}/error") is None),
+        ("main wannianrili-500", run_main(base, URL_WANNIANRILI_DATE=f"{base}/error") is not None),
+        ("main hitokoto-refused", run_main(base, URL_HITOKOTO=refused_url()) is not None),
+    ]
+    for name, ok in main_checks:
+        print(f"{name:>22} {'PASS' if ok else 'FAIL':>6}")
+
+    server.shutdown()
+    failed = sum(not ok for _, ok, _, _ in results) + sum(not ok for _, ok in main_checks)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
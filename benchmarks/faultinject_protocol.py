@@ -0,0 +1,189 @@
+"""
+分帧协议的故障注入检查：在本机启动帧服务器，客户端（client.FrameClient）经由一个
+会截断、篡改或卡住应答的 TCP 代理下载帧，检查每种故障下都能拿到正确的帧，
+并统计实际传输的负载字节数。完整帧为 30000 字节，续传时总负载应仍为 30000，
+而不是每次失败都重新下载整帧。
+
+全程离线：帧由 benchmarks/fixtures 中的数据渲染。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.faultinject_protocol
+"""
+
+import asyncio
+import contextlib
+import datetime
+import io
+import os
+import socket
+import sys
+import tempfile
+
+from benchmarks.bench_fonts import load_day_data
+from client import FrameClient
+from layout import get_plan
+from packer import pack_image
+from server import RESPONSE, RESPONSE_V2, FrameCache, FrameServer
+
+HEADER = RESPONSE_V2.size
+CLIENT_TIMEOUT = 0.3  # 故障场景下客户端的读超时（秒），让“卡住”场景尽快超时
+
+
+class FaultProxy:
+    """
+    转发客户端请求到服务器，并按 faults 队列对每个连接的应答注入一种故障：
+        None                    原样转发
+        ("cut", n)              只转发前 n 字节后关闭连接
+        ("flip", n)             翻转第 n 个字节
+        ("stall", n)            转发前 n 字节后停住，直到客户端超时
+    故障可带第三个元素，为注入后执行的回调（例如在续传之前换帧）。
+    """
+
+    def __init__(self, target_port):
+        self.target_port = target_port
+        self.faults = []
+        self.tasks = set()
+
+    async def handle(self, reader, writer):
+        # 记下处理中的连接，结束前等它们退出（“卡住”的连接会多睡一会儿）
+        self.tasks.add(asyncio.current_task())
+        fault = self.faults.pop(0) if self.faults else None
+        upstream_reader, upstream_writer = await asyncio.open_connection(
+            "127.0.0.1", self.target_port
+        )
+        upstream_writer.write(await reader.readline())
+        await upstream_writer.drain()
+        data = bytearray(await upstream_reader.read())
+        upstream_writer.close()
+
+        if fault is None:
+            writer.write(data)
+        else:
+            action, n = fault[:2]
+            if action == "flip":
+                data[n] ^= 0xFF
+                writer.write(data)
+            else:
+                writer.write(data[:n])
+                await writer.drain()
+                if action == "stall":
+                    await asyncio.sleep(CLIENT_TIMEOUT * 3)
+            if len(fault) > 2:
+                fault[2]()
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+        self.tasks.discard(asyncio.current_task())
+
+
+def render_frames():
+    """两天的 4.2 寸帧（工作日和周末），用于全量、差分和换帧场景。"""
+    data = load_day_data()
+    hitokoto = data.pop("hitokoto")
+    plan = get_plan("4.2in")
+    days = [datetime.date(2025, 1, 6), datetime.date(2025, 1, 4)]
+    return [pack_image(plan.render_day(data, hitokoto, day)) for day in days]
+
+
+def legacy_fetch(port):
+    """v1 请求（无 v=2）仍得到原来的应答头 + 整帧。"""
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.sendall(b"FRAME\n")
+        data = bytearray()
+        while chunk := sock.recv(65536):
+            data += chunk
+    return bytes(data)
+
+
+async def run_checks():
+    with contextlib.redirect_stdout(io.StringIO()):
+        frame_a, frame_b = render_frames()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, "frame.bin")
+
+        def publish(frame):
+            with open(file_name, "wb") as f:
+                f.write(frame)
+            cache.publish(frame)
+
+        with open(file_name, "wb") as f:
+            f.write(frame_a)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cache = FrameCache(file_name)
+        server = await FrameServer(cache).start_protocol("127.0.0.1", 0)
+        server_port = server.sockets[0].getsockname()[1]
+        proxy = FaultProxy(server_port)
+        proxy_server = await asyncio.start_server(proxy.handle, "127.0.0.1", 0)
+        proxy_port = proxy_server.sockets[0].getsockname()[1]
+
+        async def check(name, faults, expected, client=None, chunk=None, before=None):
+            """运行一次同步，返回客户端供后续场景复用。"""
+            if before:
+                before()
+            client = client or FrameClient("127.0.0.1", proxy_port, chunk=chunk)
+            client.timeout = CLIENT_TIMEOUT
+            proxy.faults = list(faults)
+            before_stats = dict(client.stats)
+            try:
+                changed = await asyncio.to_thread(client.sync)
+                ok = client.frame == expected
+            except Exception as e:  # 记录失败并继续其余场景
+                changed, ok = repr(e), False
+            stats = {key: client.stats[key] - before_stats[key] for key in client.stats}
+            results.append((name, ok, changed, stats, sum(1 for f in faults if f)))
+            return client
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            size = len(frame_a)
+            client = await check("clean", [], frame_a)
+            await check("not-modified", [], frame_a, client)
+            await check("cut-resume", [("cut", HEADER + size * 2 // 3)], frame_a)
+            await check("repeated-cuts", [("cut", HEADER + size // 4)] * 4, frame_a)
+            await check("stall-resume", [("stall", HEADER + size // 3)], frame_a)
+            await check("corrupt-chunked", [None, ("flip", HEADER + 100)], frame_a, chunk=4096)
+            await check("corrupt-whole", [("flip", HEADER + size // 2)], frame_a)
+            await check(
+                "changed-mid-resume",
+                [("cut", HEADER + size // 2, lambda: publish(frame_b))],
+                frame_b,
+            )
+            publish(frame_a)
+            await check("delta", [], frame_b, client, before=lambda: publish(frame_b))
+            await check(
+                "cut-delta", [("cut", HEADER + 40)], frame_a, client, before=lambda: publish(frame_a)
+            )
+            legacy = await asyncio.to_thread(legacy_fetch, server_port)
+            legacy_ok = legacy[RESPONSE.size :] == frame_a and len(legacy) == RESPONSE.size + size
+
+        await asyncio.gather(*proxy.tasks)
+        proxy_server.close()
+        server.close()
+
+    print(
+        f"{'scenario':>20} {'result':>6} {'faults':>6} {'requests':>8} "
+        f"{'payload':>8} {'crc err':>7} {'restarts':>8}"
+    )
+    failed = 0
+    for name, ok, changed, stats, faults in results:
+        failed += not ok
+        print(
+            f"{name:>20} {'PASS' if ok else 'FAIL':>6} {faults:6} {stats['requests']:8} "
+            f"{stats['payload_bytes']:8} {stats['crc_errors']:7} {stats['restarts']:8}"
+            + ("" if ok else f"  {changed}")
+        )
+    failed += not legacy_ok
+    print(f"{'legacy v1 request':>20} {'PASS' if legacy_ok else 'FAIL':>6}")
+    return failed
+
+
+def main():
+    failed = asyncio.run(run_checks())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
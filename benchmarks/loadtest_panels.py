@@ -0,0 +1,110 @@
+"""
+按屏渲染压力测试：N 个墨水屏同时通过协议端口报告设备 ID 和分辨率，
+检查同一配置只渲染一次（single-flight），并报告延迟。
+
+全程离线：当日数据来自 benchmarks/fixtures，服务器在本进程内启动。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.loadtest_panels --clients 200
+    # 客户端平均分布在所有布局上
+    python -m benchmarks.loadtest_panels --clients 200 --mixed
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.bench_fonts import load_day_data
+from benchmarks.loadtest_server import report
+from daycache import DayCache
+from layout import available_layouts, load_layout
+from panels import DaySource, PanelRenderer
+from server import RESPONSE, FrameCache, FrameServer
+
+
+async def fetch_panel(host, port, request):
+    """模拟一个墨水屏：发送请求行，读取应答头和负载，返回 (负载字节数, 耗时)。"""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(request)
+    await writer.drain()
+    header = await reader.readexactly(RESPONSE.size)
+    _, _, _, _, length = RESPONSE.unpack(header)
+    await reader.readexactly(length)
+    writer.close()
+    await writer.wait_closed()
+    return length, time.perf_counter() - start
+
+
+async def run_load(host, port, requests):
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(fetch_panel(host, port, request) for request in requests), return_exceptions=True
+    )
+    return results, time.perf_counter() - start
+
+
+def panel_requests(clients, mixed):
+    """构造请求行：默认全部是同一块 4.2 寸屏，--mixed 时在各布局的分辨率间轮换。"""
+    names = available_layouts() if mixed else ["4.2in"]
+    requests = []
+    for i in range(clients):
+        width, height = load_layout(names[i % len(names)])["size"]
+        requests.append(f"FRAME device=panel-{i} size={width}x{height}\n".encode("ascii"))
+    return requests
+
+
+async def run_spawned(clients, mixed):
+    data = load_day_data()
+    hitokoto = data.pop("hitokoto")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, "frame.bin")
+        with open(file_name, "wb") as f:
+            f.write(bytes(30000))
+        days = DaySource(
+            DayCache(os.path.join(tmp_dir, "cache")),
+            fetch=lambda day, day_data: (day_data or data, hitokoto),
+        )
+        panels = PanelRenderer(days)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cache = FrameCache(file_name)
+        server = await FrameServer(cache, panels).start_protocol("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        requests = panel_requests(clients, mixed)
+        async with server:
+            # 屏蔽服务器的逐连接日志，避免干扰测量
+            with contextlib.redirect_stdout(io.StringIO()):
+                cold, cold_elapsed = await run_load("127.0.0.1", port, requests)
+                warm, warm_elapsed = await run_load("127.0.0.1", port, requests)
+        panels.cache.close()
+
+    print("== cold (empty render cache) ==")
+    report(cold, cold_elapsed)
+    print("== warm ==")
+    report(warm, warm_elapsed)
+    stats = panels.cache.stats
+    print(
+        f"renders: {stats['renders']}  joined in-flight: {stats['joined']}  "
+        f"cache hits: {stats['hits']}"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="按屏渲染并发压测")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--mixed", action="store_true", help="客户端分布在所有布局上")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    asyncio.run(run_spawned(args.clients, args.mixed))
+
+
+if __name__ == "__main__":
+    main()
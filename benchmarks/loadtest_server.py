@@ -0,0 +1,142 @@
+"""
+帧服务器压力测试：模拟 N 个墨水屏同时连接并下载完整帧。
+
+用法（在仓库根目录执行）：
+    # 对已运行的服务器施压
+    python -m benchmarks.loadtest_server --port 8122 --clients 500
+
+    # 在本进程内启动一个本地实例再施压
+    python -m benchmarks.loadtest_server --spawn --clients 500
+
+    # 压测期间不断热替换帧，确认没有半帧
+    python -m benchmarks.loadtest_server --spawn --clients 2000 --swap-interval 0.005
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from server import FrameCache, FrameServer
+
+FRAME_SIZE = 30000  # 400x300, 2 位/像素
+
+
+async def fetch_frame(host, port):
+    """模拟一个墨水屏：连接、读到 EOF、返回 (字节数, 耗时)。"""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    received = 0
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        received += len(chunk)
+    writer.close()
+    await writer.wait_closed()
+    return received, time.perf_counter() - start
+
+
+async def run_load(host, port, clients):
+    """并发发起 clients 个连接，返回 (结果列表, 总耗时)。"""
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(fetch_frame(host, port) for _ in range(clients)), return_exceptions=True
+    )
+    return results, time.perf_counter() - start
+
+
+def report(results, elapsed, expected_size=None):
+    errors = [r for r in results if isinstance(r, BaseException)]
+    done = [r for r in results if not isinstance(r, BaseException)]
+    latencies = sorted(latency for _, latency in done)
+    torn = sum(1 for size, _ in done if expected_size and size != expected_size)
+
+    print(f"clients:     {len(results)}")
+    print(f"completed:   {len(done)}  errors: {len(errors)}  torn: {torn}")
+    print(f"frame sizes: {sorted({size for size, _ in done})}")
+    print(f"wall time:   {elapsed * 1000:.1f} ms")
+    if latencies:
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+        print(
+            f"latency:     p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, "
+            f"max {latencies[-1] * 1000:.1f} ms"
+        )
+        total = sum(size for size, _ in done)
+        print(f"throughput:  {total / elapsed / 1e6:.1f} MB/s")
+    for error in errors[:5]:
+        print(f"error: {error!r}")
+
+
+async def swap_frames(file_name, cache, interval, stats):
+    """压测期间不断原子改写帧文件并触发热替换，验证客户端不会收到半帧。"""
+    while True:
+        await asyncio.sleep(interval)
+        tmp_name = f"{file_name}.tmp"
+        with open(tmp_name, "wb") as f:
+            f.write(os.urandom(FRAME_SIZE))
+        os.replace(tmp_name, file_name)
+        if cache.reload_if_changed():
+            stats["swaps"] += 1
+
+
+async def run_spawned(clients, swap_interval=None):
+    """在本进程内启动 FrameServer（随机帧、随机端口）并施压。"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, "frame.bin")
+        with open(file_name, "wb") as f:
+            f.write(os.urandom(FRAME_SIZE))
+        with contextlib.redirect_stdout(io.StringIO()):
+            cache = FrameCache(file_name)
+        server = await FrameServer(cache).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            # 屏蔽服务器的逐连接日志，避免干扰测量
+            stats = {"swaps": 0}
+            with contextlib.redirect_stdout(io.StringIO()):
+                swapper = None
+                if swap_interval:
+                    swapper = asyncio.create_task(
+                        swap_frames(file_name, cache, swap_interval, stats)
+                    )
+                results, elapsed = await run_load("127.0.0.1", port, clients)
+                if swapper:
+                    swapper.cancel()
+    report(results, elapsed, FRAME_SIZE)
+    if swap_interval:
+        print(f"frame swaps: {stats['swaps']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="帧服务器并发压测")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8122)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--expected-size", type=int, default=None)
+    parser.add_argument("--spawn", action="store_true", help="在本进程内启动本地实例")
+    parser.add_argument(
+        "--swap-interval",
+        type=float,
+        default=None,
+        help="配合 --spawn：压测期间每隔若干秒替换一次帧，检查是否出现半帧",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.spawn:
+        asyncio.run(run_spawned(args.clients, args.swap_interval))
+    else:
+        results, elapsed = asyncio.run(run_load(args.host, args.port, args.clients))
+        report(results, elapsed, args.expected_size)
+
+
+if __name__ == "__main__":
+    main()
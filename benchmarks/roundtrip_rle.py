@@ -0,0 +1,168 @@
+"""
+帧格式（frameformat.py）的往返与错误路径检查：
+
+- PackBits：空输入、单字节、127/128/129/130 字节等包边界上的重复和字面量、
+  随机数据（均匀随机和带长游程的低熵数据）编码后解码应得到原数据，
+  且每个包不超过 128 字节、体积膨胀不超过每 128 字节 1 字节；
+- 帧头：raw / rle 两种编码在多种宽高（含像素数不是 4 的倍数）下往返一致；
+- 错误输入：字面量包越界、重复包缺少数据字节、magic 不匹配、版本不支持、
+  帧头或负载长度不足、长度与宽高不符、未知编码，都应抛出 FrameFormatError。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.roundtrip_rle
+"""
+
+import random
+import sys
+
+from frameformat import (
+    FORMAT_VERSION,
+    HEADER,
+    MAGIC,
+    MAX_PACKET,
+    FrameFormatError,
+    decode_frame,
+    encode_frame,
+    packed_size,
+    rle_decode,
+    rle_encode,
+)
+
+SEED = 20250104
+RANDOM_CASES = 200
+
+
+def packets(encoded):
+    """拆出编码结果中每个包表示的字节数。"""
+    pos, counts = 0, []
+    while pos < len(encoded):
+        n = encoded[pos]
+        if n < 128:
+            counts.append(n + 1)
+            pos += n + 2
+        else:
+            counts.append(257 - n)
+            pos += 2
+    return counts
+
+
+def rle_cases(rng):
+    """(名称, 原始数据)。"""
+    yield "empty", b""
+    yield "1 byte", b"\x5a"
+    for n in (2, 3, 127, 128, 129, 130, 256, 257, 385):
+        yield f"run {n}", b"\xff" * n
+        yield f"literal {n}", bytes(i % 251 for i in range(n))
+    yield "run 129 + literal", b"\x00" * 129 + b"\x01\x02"
+    yield "literal + run 2 + literal", b"\x01\x02\x03\x03\x04"
+    yield "alternating runs", b"".join(bytes([i % 2]) * (i % 5 + 1) for i in range(300))
+    for i in range(RANDOM_CASES):
+        size = rng.randrange(0, 2000)
+        if i % 2:
+            data = rng.randbytes(size)
+        else:
+            # 低熵：少数几个取值、随机游程长度，接近真实的日历画面
+            data = bytearray()
+            while len(data) < size:
+                data += bytes([rng.choice((0x00, 0x55, 0xAA, 0xFF))]) * rng.randrange(1, 300)
+            data = bytes(data[:size])
+        yield f"random {i}", data
+
+
+def check_rle(name, data):
+    encoded = rle_encode(data)
+    if rle_decode(encoded, len(data)) != data:
+        return "decode mismatch"
+    if any(count > MAX_PACKET for count in packets(encoded)):
+        return "packet longer than MAX_PACKET"
+    if len(encoded) > len(data) + (len(data) + MAX_PACKET - 1) // MAX_PACKET:
+        return f"expanded to {len(encoded)} bytes"
+    return None
+
+
+def frame_cases(rng):
+    """(宽, 高, 2 位打包数据)。"""
+    for width, height in [(1, 1), (3, 1), (4, 1), (5, 3), (7, 7), (296, 128), (400, 300)]:
+        size = packed_size(width, height)
+        yield width, height, rng.randbytes(size)
+        yield width, height, b"\x00" * size
+
+
+def check_frames(rng):
+    failures = []
+    count = 0
+    for width, height, packed in frame_cases(rng):
+        for encoding in ("raw", "rle"):
+            count += 1
+            frame = encode_frame(packed, width, height, encoding)
+            if decode_frame(frame) != (width, height, packed):
+                failures.append(f"{encoding} {width}x{height}")
+    return count, failures
+
+
+def header(code=1, width=4, height=1, length=0, magic=MAGIC, version=FORMAT_VERSION):
+    return HEADER.pack(magic, version, code, width, height, length)
+
+
+# (名称, 应抛出 FrameFormatError 的调用)
+MALFORMED = [
+    ("truncated literal", lambda: rle_decode(b"\x05abc")),
+    ("repeat without data byte", lambda: rle_decode(b"\x00a\xfe")),
+    ("rle decoded length", lambda: rle_decode(b"\xfe\x00", 4)),
+    ("short header", lambda: decode_frame(MAGIC + b"\x01")),
+    ("bad magic", lambda: decode_frame(header(magic=b"XXXX", length=1) + b"\x00")),
+    ("bad version", lambda: decode_frame(header(version=99, length=1) + b"\x00")),
+    ("truncated payload", lambda: decode_frame(header(length=10) + b"\x00\x00")),
+    ("raw wrong length", lambda: decode_frame(header(code=0, width=8, length=1) + b"\x00")),
+    ("rle wrong length", lambda: decode_frame(header(width=8, length=2) + b"\xfd\x00")),
+    ("unknown encoding", lambda: decode_frame(header(code=7, length=1) + b"\x00")),
+    ("encode wrong length", lambda: encode_frame(b"\x00\x00", 4, 1)),
+]
+
+
+def check_malformed():
+    failures = []
+    for name, call in MALFORMED:
+        try:
+            call()
+        except FrameFormatError:
+            continue
+        except Exception as e:  # 其他异常同样算失败，解码器应只抛 FrameFormatError
+            failures.append(f"{name}: {e!r}")
+        else:
+            failures.append(f"{name}: no error")
+    return failures
+
+
+def main():
+    rng = random.Random(SEED)
+    rle_failures = []
+    rle_count = 0
+    for name, data in rle_cases(rng):
+        rle_count += 1
+        error = check_rle(name, data)
+        if error:
+            rle_failures.append(f"{name}: {error}")
+    # 0x80 是 PackBits 的空操作包，解码时应跳过
+    rle_count += 1
+    if rle_decode(b"\x80\x00a\x80") != b"a":
+        rle_failures.append("no-op packet 0x80")
+
+    frame_count, frame_failures = check_frames(rng)
+    malformed_failures = check_malformed()
+
+    results = [
+        ("packbits round trip", rle_count, rle_failures),
+        ("frame round trip", frame_count, frame_failures),
+        ("malformed input", len(MALFORMED), malformed_failures),
+    ]
+    print(f"{'check':>20} {'result':>6} {'cases':>6}")
+    for name, count, failures in results:
+        print(f"{name:>20} {'FAIL' if failures else 'PASS':>6} {count:6}")
+        for failure in failures:
+            print(f"{'':>20} {failure}")
+    sys.exit(1 if any(failures for _, _, failures in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
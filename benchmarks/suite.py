@@ -0,0 +1,227 @@
+"""
+离线基准套件：一次跑完解析、换行、渲染、打包、头文件生成和帧服务器吞吐，
+并把结果追加到 JSON Lines 历史文件，与上一次记录对比，便于发现性能回归。
+
+全程不联网：页面来自 benchmarks/fixtures 中保存的黄历、万年历 HTML，
+一言使用保存的文本；服务器压测在本进程内启动本地实例。
+
+用法（在仓库根目录执行）：
+    python -m benchmarks.suite
+    python -m benchmarks.suite --filter parse --repeat 50
+    python -m benchmarks.suite --no-save
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+from benchmarks.bench_fonts import load_day_data
+from benchmarks.bench_parse import read_fixture
+from benchmarks.loadtest_server import run_load
+
+HISTORY = os.path.join(os.path.dirname(__file__), "history.jsonl")
+# 与上一次记录相比变慢超过该比例时标记
+REGRESSION = 0.10
+
+
+def measure(func, repeat, warmup=1):
+    """运行 func 若干次，返回每次耗时（秒）列表。"""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def build_cases(script, compress, tmp_dir, clients):
+    """
+    构造所有基准项。
+    :return: [(名称, 可调用对象, 每次调用处理的单位数, 单位名称)]
+    """
+    from bs4 import BeautifulSoup
+    from layout import DEFAULT_LAYOUT, available_layouts, get_plan, render_panels
+    from server import FrameCache, FrameServer
+
+    huangli_html = read_fixture("huangli.html")
+    wannianrili_html = read_fixture("wannianrili.html")
+    data = load_day_data()
+    weekday = datetime.date(2025, 1, 6)
+    font = get_plan(DEFAULT_LAYOUT).fonts["medium"]
+    layouts = available_layouts()
+
+    img = script.create_calendar_image(**data, day=weekday)
+    bmp = os.path.join(tmp_dir, "frame.bmp")
+    img.save(bmp)
+    bin_path = os.path.join(tmp_dir, "frame.bin")
+    header_path = os.path.join(tmp_dir, "frame.h")
+    frame = script.bmp_to_compressed_binary(bmp, bin_path)
+
+    def serve_once():
+        async def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                cache = FrameCache(bin_path)
+                server = await FrameServer(cache).start("127.0.0.1", 0)
+                port = server.sockets[0].getsockname()[1]
+                async with server:
+                    results, _ = await run_load("127.0.0.1", port, clients)
+            failed = [r for r in results if isinstance(r, BaseException) or r[0] != len(frame)]
+            if failed:
+                raise RuntimeError(f"{len(failed)} 个客户端未收到完整帧")
+
+        asyncio.run(run())
+
+    return [
+        (
+            "parse_huangli_data",
+            lambda: script.parse_huangli_data(BeautifulSoup(huangli_html, "html.parser")),
+            1,
+            "page",
+        ),
+        (
+            "parse_wannianrili_data",
+            lambda: script.parse_wannianrili_data(BeautifulSoup(wannianrili_html, "html.parser")),
+            1,
+            "page",
+        ),
+        (
+            "parse_day_pages",
+            lambda: script.parse_day_pages(
+                {"huangli": huangli_html, "wannianrili": wannianrili_html}
+            ),
+            1,
+            "day",
+        ),
+        ("wrap_text_cn", lambda: script.wrap_text_cn(data["hitokoto"] * 8, font, 300), 1, "text"),
+        ("create_calendar_image", lambda: script.create_calendar_image(**data, day=weekday), 1, "frame"),
+        (
+            "render_glyph_atlas",
+            lambda: script.create_calendar_image(**data, day=weekday, glyph_atlas=True),
+            1,
+            "frame",
+        ),
+        (
+            "render_panels_all",
+            lambda: render_panels(layouts, data, data["hitokoto"], weekday),
+            len(layouts),
+            "frame",
+        ),
+        ("bmp_to_compressed_binary", lambda: script.bmp_to_compressed_binary(bmp, bin_path), 1, "frame"),
+        ("bmp_to_c_header_binarize", lambda: compress.bmp_to_c_header_binarize(bmp, header_path), 1, "frame"),
+        (f"server_{clients}_clients", serve_once, clients, "frame"),
+    ]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def last_record(history):
+    try:
+        with open(history, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+    except OSError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+def run_suite(repeat, clients, name_filter=None):
+    """
+    运行基准套件。
+    :return: {名称: {"median_ms", "min_ms", "runs", "per_second"}}
+    """
+    import compress
+    import script
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 屏蔽被测函数自身的日志输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            cases = build_cases(script, compress, tmp_dir, clients)
+        for name, func, units, unit in cases:
+            if name_filter and name_filter not in name:
+                continue
+            runs = max(repeat // units, 3) if units > 1 else repeat
+            with contextlib.redirect_stdout(io.StringIO()):
+                times = measure(func, runs)
+            median = statistics.median(times)
+            results[name] = {
+                "median_ms": round(median * 1000, 4),
+                "min_ms": round(min(times) * 1000, 4),
+                "runs": runs,
+                "per_second": round(units / median, 1),
+                "unit": unit,
+            }
+    return results
+
+
+def report(results, previous=None):
+    baseline = (previous or {}).get("results", {})
+    print(f"{'benchmark':>28} {'median(ms)':>11} {'min(ms)':>9} {'rate':>16} {'vs last':>9}")
+    for name, result in results.items():
+        change = ""
+        old = baseline.get(name)
+        if old:
+            ratio = result["median_ms"] / old["median_ms"] - 1
+            change = f"{ratio:+.1%}" + (" !" if ratio > REGRESSION else "")
+        rate = f"{result['per_second']:.1f} {result['unit']}/s"
+        print(
+            f"{name:>28} {result['median_ms']:11.3f} {result['min_ms']:9.3f} "
+            f"{rate:>16} {change:>9}"
+        )
+    if previous:
+        print(f"compared with {previous.get('revision')} at {previous.get('timestamp')}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="离线基准套件")
+    parser.add_argument("--repeat", type=int, default=20, help="每项的运行次数")
+    parser.add_argument("--clients", type=int, default=200, help="服务器压测的并发客户端数")
+    parser.add_argument("--filter", help="只运行名称包含该字符串的基准项")
+    parser.add_argument("--history", default=HISTORY, help="JSON Lines 历史文件路径")
+    parser.add_argument("--no-save", action="store_true", help="不写入历史文件")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    previous = last_record(args.history)
+    results = run_suite(args.repeat, args.clients, args.filter)
+    report(results, previous)
+
+    if args.no_save:
+        return
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"results appended to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+统一的命令行入口，每个子命令只导入自己用到的模块：
+
+    python cli.py fetch  [--start YYYY-MM-DD] [--days N]   预取数据到缓存（requests、lxml）
+    python cli.py render [script.py 的参数]                抓取、渲染并压缩
+    python cli.py pack   IMAGE [OUTPUT]                    图片 -> 2 位打包帧（Pillow、numpy）
+    python cli.py header IMAGE... [-o FILE]                图片 -> C 头文件（Pillow、numpy）
+    python cli.py serve  [server.py 的参数]                帧服务器（仅标准库，--panels 时加载渲染）
+    python cli.py daemon [daemon.py 的参数]                常驻渲染与帧服务
+
+pack 和 header 不加载网络和 HTML 相关的库（requests、bs4、lxml），适合在构建脚本中频繁调用。
+"""
+
+import argparse
+import datetime
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def cmd_fetch(args, rest):
+    from daycache import DayCache
+    from script import prefetch_days
+
+    os.chdir(BASE_DIR)
+    prefetch_days(args.start or datetime.date.today(), args.days, DayCache())
+
+
+def cmd_render(args, rest):
+    import script
+
+    script.run(rest)
+
+
+def cmd_pack(args, rest):
+    from script import bmp_to_compressed_binary
+
+    output = args.output or os.path.splitext(args.image)[0] + ".bin"
+    data = bmp_to_compressed_binary(
+        args.image, output, args.threshold, args.encoding, args.dither
+    )
+    print(f"{len(data)} 字节")
+
+
+def cmd_header(args, rest):
+    import compress
+
+    if len(args.images) == 1:
+        compress.bmp_to_c_header_binarize(
+            args.images[0], args.output, args.name, args.threshold, args.encoding, args.dither
+        )
+    else:
+        compress.images_to_c_header(
+            args.images, args.output, args.name, args.threshold, args.encoding, args.dither
+        )
+
+
+def cmd_serve(args, rest):
+    import server
+
+    server.run(rest)
+
+
+def cmd_daemon(args, rest):
+    import daemon
+
+    daemon.run(rest)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="墨水屏日历工具")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    fetch = commands.add_parser("fetch", help="预取今天起若干天的数据到缓存")
+    fetch.add_argument("--start", type=datetime.date.fromisoformat, help="起始日期 YYYY-MM-DD")
+    fetch.add_argument("--days", type=int, default=7, help="天数")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    # 这几个子命令的参数原样交给对应模块解析（--help 同样由模块处理）
+    for name, handler, help_text in [
+        ("render", cmd_render, "抓取、渲染并压缩（参数同 script.py）"),
+        ("serve", cmd_serve, "启动帧服务器（参数同 server.py）"),
+        ("daemon", cmd_daemon, "启动常驻渲染与帧服务（参数同 daemon.py）"),
+    ]:
+        sub = commands.add_parser(name, help=help_text, add_help=False)
+        sub.set_defaults(handler=handler, forward=True)
+
+    encodings = ["raw", "rle"]
+    # 与 packer.DITHER_MODES 相同（此处不导入 packer，以免 --help 也要加载 numpy）
+    dither_modes = ["nearest", "ordered", "floyd-steinberg"]
+    dither_help = "映射到最近的三色调色板颜色并抖动（照片、彩色插画），默认按灰度阈值二值化"
+    pack = commands.add_parser("pack", help="把图片压缩为 2 位打包帧")
+    pack.add_argument("image", help="输入图片路径")
+    pack.add_argument("output", nargs="?", help="输出路径，默认与图片同名的 .bin")
+    pack.add_argument("--threshold", type=int, default=128, help="二值化灰度阈值")
+    pack.add_argument("--encoding", choices=encodings, help="输出带版本头的帧")
+    pack.add_argument("--dither", choices=dither_modes, help=dither_help)
+    pack.set_defaults(handler=cmd_pack)
+
+    header = commands.add_parser("header", help="把图片压缩为 C 语言头文件")
+    header.add_argument("images", nargs="+", help="输入图片路径，多个时生成带索引表的数组")
+    header.add_argument("-o", "--output", default="compressed_image.h", help="输出头文件路径")
+    header.add_argument("--name", default="compressed_image", help="C 数组名称")
+    header.add_argument("--threshold", type=int, default=128, help="二值化灰度阈值")
+    header.add_argument("--encoding", choices=encodings, help="输出带版本头的帧")
+    header.add_argument("--dither", choices=dither_modes, help=dither_help)
+    header.set_defaults(handler=cmd_header)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if rest and not getattr(args, "forward", False):
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    return args.handler(args, rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+分帧协议（见 server.FrameServer.handle_request）的参考客户端，模拟墨水屏的下载逻辑：
+
+- 记住当前持有的帧版本，版本未变时服务器只回一个不带负载的应答头；
+- 每段负载用应答头中的 CRC32 校验，损坏的一段丢弃重下；
+- 连接中断时保留已收到的字节，重连后带上 offset 和 if-range 续传，
+  期间帧已更新则服务器从头发送，客户端随之丢弃旧的部分数据；
+- 全部收齐后再用完整负载的 CRC32 校验一次，差分帧应用到当前帧（带帧头的先解码）上。
+
+用法：
+    python client.py --host 192.168.1.10 --out frame.bin
+    python client.py --host 192.168.1.10 --chunk 4096 device=kitchen size=800x480
+"""
+
+import argparse
+import socket
+import zlib
+
+from server import (
+    FRAMED_PROTOCOL_VERSION,
+    KIND_DELTA,
+    KIND_NOT_MODIFIED,
+    PROTOCOL_PORT,
+    RESPONSE_MAGIC,
+    RESPONSE_V2,
+)
+
+TIMEOUT = 5.0  # 连接和读取超时（秒）
+RETRIES = 5  # 单次同步最多重试的次数
+
+
+class ProtocolError(Exception):
+    """应答头不合法或与续传状态不一致。"""
+
+
+class FrameClient:
+    """
+    :param host: 服务器地址
+    :param port: 协议端口
+    :param params: 附加的请求参数，如 {"device": "kitchen", "size": "800x480"}
+    :param chunk: 每次请求的最大负载字节数，为 None 时一次取完
+    """
+
+    def __init__(self, host, port=PROTOCOL_PORT, params=None, chunk=None, timeout=TIMEOUT):
+        self.host = host
+        self.port = port
+        self.params = params or {}
+        self.chunk = chunk
+        self.timeout = timeout
+        self.version = 0
+        self.frame = None
+        # 下载中的负载：(类型, 帧版本, 完整长度, 完整 CRC32) 与已收到的字节
+        self.pending = None
+        self.received = bytearray()
+        self.stats = {"requests": 0, "payload_bytes": 0, "crc_errors": 0, "restarts": 0}
+
+    def request_line(self):
+        params = dict(self.params, v=FRAMED_PROTOCOL_VERSION)
+        if self.frame is not None:
+            params["have"] = self.version
+        if self.pending is not None and self.received:
+            params["offset"] = len(self.received)
+            params["if-range"] = f"{self.pending[3]:08x}"
+        if self.chunk:
+            params["length"] = self.chunk
+        words = ["FRAME"] + [f"{key}={value}" for key, value in params.items()]
+        return (" ".join(words) + "\n").encode("ascii")
+
+    def exchange(self):
+        """
+        发送一次请求并读取应答。连接中途断开时，已收到的负载仍然返回。
+        :return: (应答头字段元组, 收到的负载 bytes)
+        """
+        self.stats["requests"] += 1
+        with socket.create_connection((self.host, self.port), self.timeout) as sock:
+            sock.settimeout(self.timeout)
+            sock.sendall(self.request_line())
+            header = _recv_exact(sock, RESPONSE_V2.size)
+            if len(header) < RESPONSE_V2.size:
+                raise ConnectionError("应答头不完整")
+            fields = RESPONSE_V2.unpack(header)
+            if fields[0] != RESPONSE_MAGIC or fields[1] != FRAMED_PROTOCOL_VERSION:
+                raise ProtocolError(f"不支持的应答：{header[:6]!r}")
+            payload = _recv_exact(sock, fields[6])
+        self.stats["payload_bytes"] += len(payload)
+        return fields, payload
+
+    def step(self):
+        """
+        请求一次并合并结果。
+        :return: True 表示同步完成（帧已更新或未修改），False 表示还需继续请求
+        """
+        fields, payload = self.exchange()
+        _, _, kind, version, total, offset, length, total_crc, payload_crc = fields
+        if kind == KIND_NOT_MODIFIED:
+            self.pending = None
+            self.received.clear()
+            return True
+
+        identity = (kind, version, total, total_crc)
+        if offset == 0:
+            if self.pending is not None and self.received and identity != self.pending:
+                self.stats["restarts"] += 1
+            self.pending = identity
+            self.received.clear()
+        elif identity != self.pending or offset != len(self.received):
+            raise ProtocolError("续传位置与本地数据不一致")
+
+        if len(payload) == length and zlib.crc32(payload) != payload_crc:
+            # 本段损坏：丢弃，下次从同一位置重新请求
+            self.stats["crc_errors"] += 1
+            raise ConnectionError("负载 CRC32 校验失败")
+        self.received += payload
+        if len(payload) < length:
+            raise ConnectionError("连接中断，等待续传")
+        if len(self.received) < total:
+            return False
+
+        body = bytes(self.received)
+        self.pending = None
+        self.received.clear()
+        if zlib.crc32(body) != total_crc:
+            self.stats["crc_errors"] += 1
+            raise ConnectionError("完整负载 CRC32 校验失败")
+        if kind == KIND_DELTA:
+            from framediff import apply_delta
+            from frameformat import unwrap_frame
+
+            try:
+                # 差分针对 2 位打包数据，持有的是带帧头的完整帧时先解码
+                body = apply_delta(unwrap_frame(self.frame), body)
+            except ValueError as e:
+                # 本地帧与差分的基准不符：丢弃本地帧，下次请求完整帧
+                self.frame = None
+                raise ProtocolError(f"无法应用差分帧：{e}")
+        self.frame = body
+        self.version = version
+        return True
+
+    def sync(self, retries=RETRIES):
+        """
+        同步到服务器的当前帧，失败时重试（续传已收到的部分）。
+        :return: True 表示帧发生了变化
+        """
+        version = self.version
+        failures = 0
+        while True:
+            try:
+                if self.step():
+                    return self.version != version
+            except (OSError, ProtocolError) as e:
+                if isinstance(e, ProtocolError):
+                    self.pending = None
+                    self.received.clear()
+                failures += 1
+                if failures > retries:
+                    raise
+                print(f"重试（{failures}/{retries}）：{e}")
+
+
+def _recv_exact(sock, size):
+    """读取 size 字节，连接提前关闭、被重置或超时时返回已收到的部分。"""
+    data = bytearray()
+    while len(data) < size:
+        try:
+            chunk = sock.recv(min(size - len(data), 65536))
+        except (ConnectionError, TimeoutError):
+            break
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="分帧协议参考客户端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PROTOCOL_PORT)
+    parser.add_argument("--chunk", type=int, help="每次请求的最大负载字节数")
+    parser.add_argument("--out", help="保存收到的帧")
+    parser.add_argument("params", nargs="*", help="附加请求参数，如 device=kitchen size=800x480")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    params = dict(param.partition("=")[::2] for param in args.params)
+    client = FrameClient(args.host, args.port, params, args.chunk)
+    client.sync()
+    print(f"帧 v{client.version}，{len(client.frame)} 字节，{client.stats}")
+    if args.out:
+        with open(args.out, "wb") as f:
+            f.write(client.frame)
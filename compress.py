@@ -1,13 +1,36 @@
+import os
+
 from PIL import Image
 
-# 定义颜色映射表
-COLOR_MAP = {
-    (255, 255, 255): 0b00,  # 白色
-    (0, 0, 0): 0b01,        # 黑色
-    (255, 0, 0): 0b10       # 红色
-}
+from frameformat import ENCODINGS, encode_frame
+from packer import iter_packed
+
+# 每行最多 12 个字节，每个元素形如 "0xAB, "（6 个字符）
+BYTES_PER_LINE = 12
+ITEM_WIDTH = 6
+# 头文件写缓冲区大小
+WRITE_BUFFER = 1 << 16
+
 
-def bmp_to_c_header_binarize(image_path, header_file_name="compressed_image.h", output_c_name="compressed_image", threshold=128):
+def _image_chunks(image_path, threshold=128, encoding=None, dither=None):
+    """
+    打开图片并返回 (width, height, 字节块迭代器)。
+    encoding 为 None 时流式打包；"raw" / "rle" 时返回带帧头的整帧。
+    dither 见 packer.quantize。
+    """
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+    width, height = img.size
+
+    # 流式打包像素数据（非标准颜色按灰度阈值二值化，或按 dither 映射到最近的调色板颜色）
+    chunks = iter_packed(img, threshold, dither=dither)
+    if encoding:
+        # 行程编码需要完整数据
+        chunks = [encode_frame(b"".join(chunks), width, height, encoding)]
+    return width, height, chunks
+
+
+def bmp_to_c_header_binarize(image_path, header_file_name="compressed_image.h", output_c_name="compressed_image", threshold=128, encoding=None, dither=None):
     """
     压缩 BMP 图片为 C 语言头文件，并对非标准颜色进行二值化。
 
@@ -16,78 +39,201 @@ def bmp_to_c_header_binarize(image_path, header_file_name="compressed_image.h",
         header_file_name: 输出 C 头文件路径
         output_c_name: 生成的数组名称
         threshold: 二值化灰度阈值（默认 128）
+        encoding: None 输出无帧头的 2 位打包数据；"raw" / "rle" 输出带版本头的帧
+                  （格式及单片机端解码方法见 frameformat.py）
+        dither: None 按灰度阈值二值化；"nearest" / "ordered" / "floyd-steinberg"
+                映射到最近的三色调色板颜色并抖动，适合照片和彩色插画（见 packer.quantize）
     """
-    # 打开图片
-    img = Image.open(image_path)
+    width, height, chunks = _image_chunks(image_path, threshold, encoding, dither)
+
+    with open(header_file_name, "w", encoding="utf-8", buffering=WRITE_BUFFER) as header_file:
+        header_file.write(f"#ifndef {output_c_name.upper()}_H\n")
+        header_file.write(f"#define {output_c_name.upper()}_H\n\n")
+
+        # 声明数组和宽高
+        header_file.write(f"const unsigned char {output_c_name}[] = {{\n")
+        write_c_array_body(header_file, chunks)
+        header_file.write("};\n\n")
+        header_file.write(f"const int {output_c_name}_width = {width};\n")
+        header_file.write(f"const int {output_c_name}_height = {height};\n")
+        if encoding:
+            header_file.write(f"const int {output_c_name}_encoding = {ENCODINGS[encoding]};\n")
+        header_file.write("\n")
+        header_file.write("#endif\n")
 
-    # 确保是 RGB 格式
-    img = img.convert("RGB")
+    print(f"Header file '{header_file_name}' has been successfully generated.")
 
-    # 获取图片的宽和高
-    width, height = img.size
 
-    pixels = img.load()
-
-    # 检查并处理非标准颜色
-    for y in range(height):
-        for x in range(width):
-            color = pixels[x, y]
-            if color not in COLOR_MAP:
-                # 将非标准颜色二值化处理（灰度阈值判断）
-                gray = int(0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2])  # 转灰度
-                if gray >= threshold:
-                    pixels[x, y] = (255, 255, 255)  # 白色
-                else:
-                    pixels[x, y] = (0, 0, 0)  # 黑色
-
-    # 压缩像素数据
-    compressed_data = []
-    current_byte = 0
-    bit_position = 0
-
-    for y in range(height):
-        for x in range(width):
-            # 获取当前像素的颜色编码 (2 bits)
-            color_bits = COLOR_MAP[pixels[x, y]]
-
-            # 将颜色编码插入到当前字节的正确位置
-            current_byte |= (color_bits << (6 - bit_position))  # 每个像素占 2 位
-
-            bit_position += 2
-            if bit_position == 8:
-                # 当前字节填满 8 位，添加到压缩数据
-                compressed_data.append(current_byte)
-                current_byte = 0
-                bit_position = 0
-
-    # 如果最后一个字节没有填满 8 位，补 0 并添加到压缩数据
-    if bit_position > 0:
-        compressed_data.append(current_byte)
-
-    # 生成 C 语言头文件内容
-    header_content = f"#ifndef {output_c_name.upper()}_H\n"
-    header_content += f"#define {output_c_name.upper()}_H\n\n"
-
-    # 声明数组和宽高
-    header_content += f"const unsigned char {output_c_name}[] = {{\n"
-    for i, byte in enumerate(compressed_data):
-        if i % 12 == 0:
-            header_content += "    "  # 每行最多 12 个字节
-        header_content += f"0x{byte:02X}, "
-        if (i + 1) % 12 == 0:
-            header_content += "\n"
-    if len(compressed_data) % 12 != 0:
-        header_content += "\n"
-    header_content += "};\n\n"
-    header_content += f"const int {output_c_name}_width = {width};\n"
-    header_content += f"const int {output_c_name}_height = {height};\n\n"
-    header_content += "#endif\n"
-
-    # 写入头文件
-    with open(header_file_name, "w") as header_file:
-        header_file.write(header_content)
+def images_to_c_header(image_paths, header_file_name="images.h", output_c_name="images", threshold=128, encoding=None, dither=None):
+    """
+    将多张图片打包进同一个 C 头文件：所有图片的数据首尾相接放在一个数组中，
+    另附索引表记录每张图片的偏移、长度和宽高。
+
+    生成的索引表形如：
+        typedef struct { unsigned long offset; unsigned long length;
+                         unsigned short width; unsigned short height; } images_entry_t;
+        const images_entry_t images_index[] = { {0, 30000, 400, 300}, ... };
+        const int images_count = 2;
+    第 i 张图片的数据为 images + images_index[i].offset。
+
+    参数：
+        image_paths: 输入图片路径列表
+        header_file_name: 输出 C 头文件路径
+        output_c_name: 生成的数组名称（索引表等名称以此为前缀）
+        threshold: 二值化灰度阈值（默认 128）
+        encoding: None / "raw" / "rle"，对所有图片生效（同 bmp_to_c_header_binarize）
+        dither: 抖动方式，对所有图片生效（同 bmp_to_c_header_binarize）
+    返回：
+        [(offset, length, width, height)]
+    """
+    guard = output_c_name.upper()
+    entries = []
+    offset = 0
+
+    with open(header_file_name, "w", encoding="utf-8", buffering=WRITE_BUFFER) as header_file:
+        header_file.write(f"#ifndef {guard}_H\n")
+        header_file.write(f"#define {guard}_H\n\n")
+
+        header_file.write(f"const unsigned char {output_c_name}[] = {{\n")
+        for index, image_path in enumerate(image_paths):
+            width, height, chunks = _image_chunks(image_path, threshold, encoding, dither)
+            # 每张图片从新的一行开始，并注明来源
+            header_file.write(f"    // [{index}] {os.path.basename(image_path)}\n")
+            length = write_c_array_body(header_file, chunks)
+            entries.append((offset, length, width, height))
+            offset += length
+        header_file.write("};\n\n")
+
+        header_file.write("typedef struct {\n")
+        header_file.write("    unsigned long offset;\n")
+        header_file.write("    unsigned long length;\n")
+        header_file.write("    unsigned short width;\n")
+        header_file.write("    unsigned short height;\n")
+        header_file.write(f"}} {output_c_name}_entry_t;\n\n")
+
+        header_file.write(f"const {output_c_name}_entry_t {output_c_name}_index[] = {{\n")
+        for entry in entries:
+            header_file.write("    {%d, %d, %d, %d},\n" % entry)
+        header_file.write("};\n\n")
+        header_file.write(f"const int {output_c_name}_count = {len(entries)};\n")
+        if encoding:
+            header_file.write(f"const int {output_c_name}_encoding = {ENCODINGS[encoding]};\n")
+        header_file.write("\n")
+        header_file.write("#endif\n")
+
+    print(f"Header file '{header_file_name}' has been successfully generated.")
+    return entries
+
+
+def atlas_to_c_header(atlas, header_file_name="glyph_atlas.h", output_c_name="glyph_atlas"):
+    """
+    将字形图集（glyphatlas.GlyphAtlas）输出为 C 头文件，供墨水屏端自行绘制文字。
+
+    生成内容：
+        {name}_bitmaps[]：所有字形的 1 位位图，逐行按字节对齐，高位在前
+        {name}_glyphs[]：按码位升序排列的字形表，可二分查找
+        {name}_count、{name}_size、{name}_line_height
+
+    参数：
+        atlas: GlyphAtlas 对象
+        header_file_name: 输出 C 头文件路径
+        output_c_name: 生成的数组名称前缀
+    返回：
+        字形个数
+    """
+    entries = []
+    bitmaps = []
+    offset = 0
+    for char in sorted(atlas.advances, key=ord):
+        advance = round(atlas.advances[char] * 64)
+        glyph = atlas.glyphs.get(char)
+        if glyph is None:
+            entries.append((ord(char), advance, 0, 0, 0, 0, offset, char))
+            continue
+        bitmap, left, top = glyph
+        data = bitmap.tobytes()
+        entries.append((ord(char), advance, left, top, *bitmap.size, offset, char))
+        bitmaps.append(data)
+        offset += len(data)
+
+    guard = output_c_name.upper()
+    with open(header_file_name, "w", encoding="utf-8", buffering=WRITE_BUFFER) as header_file:
+        header_file.write(f"#ifndef {guard}_H\n")
+        header_file.write(f"#define {guard}_H\n\n")
+
+        header_file.write(f"const unsigned char {output_c_name}_bitmaps[] = {{\n")
+        write_c_array_body(header_file, bitmaps)
+        header_file.write("};\n\n")
+
+        header_file.write("typedef struct {\n")
+        header_file.write("    unsigned long codepoint;\n")
+        header_file.write("    unsigned short advance;  /* 1/64 像素 */\n")
+        header_file.write("    short x_offset;\n")
+        header_file.write("    short y_offset;\n")
+        header_file.write("    unsigned char width;\n")
+        header_file.write("    unsigned char height;\n")
+        header_file.write("    unsigned long offset;\n")
+        header_file.write(f"}} {output_c_name}_glyph_t;\n\n")
+
+        header_file.write(f"const {output_c_name}_glyph_t {output_c_name}_glyphs[] = {{\n")
+        for *fields, char in entries:
+            header_file.write("    {0x%04X, %d, %d, %d, %d, %d, %d},  /* %s */\n" % (*fields, char))
+        header_file.write("};\n\n")
+        header_file.write(f"const int {output_c_name}_count = {len(entries)};\n")
+        header_file.write(f"const int {output_c_name}_size = {atlas.size};\n")
+        header_file.write(f"const int {output_c_name}_line_height = {atlas.line_height};\n")
+        header_file.write("\n")
+        header_file.write("#endif\n")
 
     print(f"Header file '{header_file_name}' has been successfully generated.")
+    return len(entries)
+
+
+def format_c_rows(data):
+    """
+    将一段字节批量格式化为 C 数组元素行（每行最多 12 个字节，末行可不满）。
+
+    先用 bytes.hex 一次性转成十六进制，再按固定宽度切成行，
+    避免逐字节格式化和字符串反复拼接。
+
+    参数：
+        data: bytes / bytearray / memoryview
+    返回：
+        str，每行形如 "    0xAB, 0xCD, \n"
+    """
+    if not data:
+        return ""
+    # "AB,CD,EF" -> "0xAB, 0xCD, 0xEF, "，每个元素恰好 6 个字符
+    items = "0x" + bytes(data).hex(",").upper().replace(",", ", 0x") + ", "
+    step = BYTES_PER_LINE * ITEM_WIDTH
+    return "".join(
+        ["    " + items[i : i + step] + "\n" for i in range(0, len(items), step)]
+    )
+
+
+def write_c_array_body(stream, chunks):
+    """
+    将字节块逐块写成 C 数组的元素行（每行最多 12 个字节），不在内存中拼接整个文件。
+
+    每个块按整行批量格式化后一次写入，不足一行的尾部留到下一块。
+
+    参数：
+        stream: 可写的文本流
+        chunks: 可迭代的 bytes 块（如 packer.iter_packed 的输出）
+    返回：
+        写入的字节数
+    """
+    total = 0
+    pending = b""
+    for chunk in chunks:
+        total += len(chunk)
+        if pending:
+            chunk = pending + bytes(chunk)
+        whole = len(chunk) - len(chunk) % BYTES_PER_LINE
+        stream.write(format_c_rows(chunk[:whole]))
+        pending = bytes(chunk[whole:])
+    stream.write(format_c_rows(pending))
+    return total
 
 
 # 示例用法
@@ -0,0 +1,254 @@
+"""
+常驻服务：在同一进程内定时抓取、渲染、打包，并直接提供帧。
+
+与 cron 每次启动 script.py 相比，字体、已编译的布局、HTTP 连接和当日数据都常驻内存；
+新帧生成后直接换入 FrameCache，不再经由文件轮询通知 server.py。
+帧仍会原子写入 --bin 指定的文件，便于其他工具读取。
+
+调度：每天零点后（留出 --rollover-delay 秒等网站更新）渲染新的一天；
+另可用 --interval 按固定间隔重新渲染（例如刷新一言）。抓取失败时每 RETRY_INTERVAL 秒重试。
+
+用法：
+    python daemon.py --interval 3600
+    python daemon.py --layout 4.2in --layout 7.5in --panels
+"""
+
+import argparse
+import asyncio
+import datetime
+import functools
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import script
+from layout import DEFAULT_LAYOUT, load_layout
+from server import HOST, PORT, PROTOCOL_PORT, FrameCache, FrameHistory, FrameServer
+
+ROLLOVER_DELAY = 60  # 零点后等待的秒数，网站的“今日”页面通常稍晚才切换
+RETRY_INTERVAL = 300  # 抓取失败后的重试间隔（秒）
+CLOCK_CHECK = 60  # 等待期间每隔多少秒重新对时，应对系统休眠或校时
+
+
+def next_run(now, interval=None, rollover_delay=ROLLOVER_DELAY):
+    """
+    下一次渲染的时间：下一个零点（加上延迟）与 now + interval 中较早的一个。
+    :param now: datetime.datetime
+    :param interval: 固定间隔（秒），为 None 时只在换日时渲染
+    """
+    tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+    due = tomorrow + datetime.timedelta(seconds=rollover_delay)
+    if interval:
+        due = min(due, now + datetime.timedelta(seconds=interval))
+    return due
+
+
+async def sleep_until(due):
+    """按墙上时钟等待到 due，分段睡眠以便发现时钟跳变。"""
+    while True:
+        remaining = (due - datetime.datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, CLOCK_CHECK))
+
+
+class CalendarDaemon:
+    """
+    :param binary_path: 压缩帧输出路径（多个布局时按 script.panel_path 加后缀）
+    :param layouts: 面板布局名列表，推送/协议端口提供第一个布局的帧
+    :param interval: 固定重新渲染间隔（秒），为 None 时只在换日时渲染
+    :param panels: 是否在协议端口上启用按屏渲染（见 panels.py）
+    其余参数同 script.main。
+    """
+
+    def __init__(
+        self,
+        binary_path=script.OUTPUT_BINARY,
+        layouts=None,
+        interval=None,
+        rollover_delay=ROLLOVER_DELAY,
+        encoding=None,
+        glyph_atlas=False,
+        palette=False,
+        panels=False,
+        devices=None,
+        render_cache=None,
+    ):
+        self.binary_path = binary_path
+        self.layouts = layouts or [DEFAULT_LAYOUT]
+        self.interval = interval
+        self.rollover_delay = rollover_delay
+        self.encoding = encoding
+        self.glyph_atlas = glyph_atlas
+        self.palette = palette
+        # 连接池跨渲染复用，省去每次的 TCP/TLS 握手
+        self.session = script.create_session()
+        # 所有渲染（定时帧和按屏帧）串行在同一个线程中，字体对象不跨线程共享
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+        self.cache = None
+        self.panels = None
+        if panels:
+            from panels import RENDER_CACHE_SIZE, DaySource, PanelRenderer, fetch_day
+
+            days = DaySource(fetch=functools.partial(fetch_day, session=self.session))
+            self.panels = PanelRenderer(
+                days, devices, render_cache or RENDER_CACHE_SIZE, self.executor
+            )
+
+    def render(self):
+        """
+        抓取、渲染并写出帧（阻塞，在渲染线程中执行）。
+        :return: 压缩帧 bytes，抓取失败时返回 None
+        """
+        return script.main(
+            image_path=None,
+            binary_path=self.binary_path,
+            encoding=self.encoding,
+            layouts=self.layouts,
+            glyph_atlas=self.glyph_atlas,
+            palette=self.palette,
+            session=self.session,
+        )
+
+    async def refresh(self):
+        """
+        渲染一次并换入新帧。
+        :return: True 表示成功
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        frame = await loop.run_in_executor(self.executor, self.render)
+        if frame is None:
+            print("抓取失败，本次未生成新帧")
+            return False
+        if self.cache is None:
+            # 多个面板时 script.main 的输出带布局名后缀，服务的是第一个布局的那份
+            suffix = self.layouts[0] if len(self.layouts) > 1 else None
+            self.cache = FrameCache(
+                script.panel_path(self.binary_path, suffix),
+                FrameHistory(frame_size=tuple(load_layout(self.layouts[0])["size"])),
+                frame,
+            )
+            version = self.cache.history.latest[0]
+        elif frame == self.cache.current:
+            # 内容未变（如周末没有一言）不发布新版本，墨水屏可以继续收到“未修改”
+            print(f"帧未变化，仍为 v{self.cache.history.latest[0]}")
+            return True
+        else:
+            version = self.cache.publish(frame)
+        print(f"新帧 v{version} 已就绪，耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+        return True
+
+    async def try_refresh(self):
+        """
+        refresh 的包装：渲染中抛出的异常（如网站改版或维护页导致解析出错）
+        打印堆栈后按失败处理，调度任务不会因此退出。
+        :return: True 表示成功
+        """
+        try:
+            return await self.refresh()
+        except Exception:
+            print("渲染出错，稍后重试：")
+            traceback.print_exc()
+            return False
+
+    async def schedule(self):
+        """后台调度任务：首帧已由 run() 生成，之后按 next_run 定时刷新，失败时提前重试。"""
+        due = next_run(datetime.datetime.now(), self.interval, self.rollover_delay)
+        while True:
+            print(f"下次渲染：{due.isoformat(timespec='seconds')}")
+            await sleep_until(due)
+            if await self.try_refresh():
+                due = next_run(datetime.datetime.now(), self.interval, self.rollover_delay)
+            else:
+                due = datetime.datetime.now() + datetime.timedelta(seconds=RETRY_INTERVAL)
+
+    async def run(self, host=HOST, port=PORT, protocol_port=PROTOCOL_PORT):
+        # 首帧就绪前不开始监听，墨水屏不会拿到空帧
+        while not await self.try_refresh():
+            await asyncio.sleep(RETRY_INTERVAL)
+        frame_server = FrameServer(self.cache, self.panels)
+        server = await frame_server.start(host, port)
+        protocol_server = await frame_server.start_protocol(host, protocol_port)
+        scheduler = asyncio.create_task(self.schedule())
+        print(f"Daemon is listening on {host}:{port} (push) and {host}:{protocol_port} (protocol)...")
+        try:
+            async with server, protocol_server:
+                await asyncio.gather(server.serve_forever(), protocol_server.serve_forever())
+        finally:
+            scheduler.cancel()
+            self.session.close()
+            self.executor.shutdown(wait=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="常驻的日历渲染与帧服务")
+    parser.add_argument(
+        "--bin",
+        default=os.path.join(script.BASE_DIR, script.OUTPUT_BINARY),
+        help="压缩数据输出路径",
+    )
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument(
+        "--protocol-port", type=int, default=PROTOCOL_PORT, help="请求/应答协议端口"
+    )
+    parser.add_argument(
+        "--interval", type=float, metavar="SECONDS", help="固定重新渲染间隔，默认只在换日时渲染"
+    )
+    parser.add_argument(
+        "--rollover-delay",
+        type=float,
+        default=ROLLOVER_DELAY,
+        metavar="SECONDS",
+        help="零点后延迟多少秒渲染新的一天",
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=sorted(script.ENCODINGS),
+        help="输出带版本头的帧（raw 或 rle）；默认输出无帧头的原始数据",
+    )
+    parser.add_argument("--layout", action="append", metavar="NAME", help="面板布局，可重复指定")
+    parser.add_argument("--glyph-atlas", action="store_true", help="用字形图集绘制文字")
+    parser.add_argument("--palette", action="store_true", help="直接渲染为三色调色板图片")
+    parser.add_argument(
+        "--panels", action="store_true", help="在协议端口上按设备 ID / 分辨率按需渲染"
+    )
+    parser.add_argument("--devices", default="devices.json", help="设备配置文件（JSON）")
+    parser.add_argument("--render-cache", type=int, help="按屏渲染结果的 LRU 容量")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    """命令行入口（python daemon.py 或 python cli.py daemon）。"""
+    args = parse_args(argv)
+    # 命令行给出的路径以调用方的当前目录为准，之后切换到仓库目录（字体、素材、缓存）
+    args.bin = os.path.abspath(args.bin)
+    args.devices = os.path.abspath(args.devices)
+    os.chdir(script.BASE_DIR)
+    devices = None
+    if args.panels:
+        from panels import load_devices
+
+        devices = load_devices(args.devices)
+    daemon = CalendarDaemon(
+        args.bin,
+        args.layout,
+        args.interval,
+        args.rollover_delay,
+        args.encoding,
+        args.glyph_atlas,
+        args.palette,
+        args.panels,
+        devices,
+        args.render_cache,
+    )
+    try:
+        asyncio.run(daemon.run(args.host, args.port, args.protocol_port))
+    except KeyboardInterrupt:
+        print("\nDaemon shutting down...")
+
+
+if __name__ == "__main__":
+    run()
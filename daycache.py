@@ -0,0 +1,96 @@
+import datetime
+import json
+import os
+import time
+
+# 默认缓存目录与有效期
+CACHE_DIR = "./cache"
+CACHE_TTL = 7 * 24 * 3600  # 秒；只对已过去的日期生效，当天及以后的数据不过期
+
+
+class DayCache:
+    """
+    按日期缓存解析后的当日数据（黄历字段 + 万年历今日文本），每天一个 JSON 文件。
+
+    同一天内重复或重试渲染时直接读取缓存，跳过网络请求和 HTML 解析；
+    也可以提前写入未来若干天的数据，离线时照常渲染。
+    当天及以后的日期不过期，提前一个月预取的数据到了当天仍然有效；
+    已过去的日期在写入 ttl 秒后过期（批量渲染历史日期时会重新抓取）。
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    def path(self, day):
+        return os.path.join(self.directory, f"{day.isoformat()}.json")
+
+    def get(self, day):
+        """
+        :param day: datetime.date
+        :return: 缓存的数据 dict，不存在、损坏或已过期时返回 None
+        """
+        try:
+            with open(self.path(day), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.expired(day, entry):
+            return None
+        return entry.get("data")
+
+    def expired(self, day, entry):
+        """
+        :param day: datetime.date
+        :param entry: 缓存文件的内容
+        :return: 是否已过期（只有已过去的日期会过期）
+        """
+        if self.ttl is None or day >= datetime.date.today():
+            return False
+        return time.time() - entry.get("fetched_at", 0) > self.ttl
+
+    def put(self, day, data):
+        """
+        写入缓存（先写临时文件再替换，避免并发读到半个文件）。
+        :param day: datetime.date
+        :param data: 可 JSON 序列化的 dict
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(day)
+        tmp_path = f"{path}.tmp"
+        entry = {"date": day.isoformat(), "fetched_at": time.time(), "data": data}
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def missing(self, days):
+        """返回 days 中尚未缓存（或已过期）的日期。"""
+        return [day for day in days if self.get(day) is None]
+
+    def prune(self, before=None):
+        """
+        删除早于 before 的缓存文件。
+        :param before: datetime.date，为 None 时删除已过期或损坏的缓存文件
+        :return: 删除的文件数
+        """
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext != ".json":
+                continue
+            try:
+                day = datetime.date.fromisoformat(stem)
+            except ValueError:
+                continue
+            if before is None:
+                stale = self.get(day) is None
+            else:
+                stale = day < before
+            if stale:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
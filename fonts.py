@@ -0,0 +1,75 @@
+"""
+进程级字体注册表：每个 (字体路径, 字号) 只加载一次，并缓存常用字符串的宽度。
+
+大号 CJK 字体文件有数 MB，ImageFont.truetype 每次都要重新打开和解析，
+原先每次渲染都会重复加载五次，是单帧渲染的主要启动开销。
+"""
+
+from functools import lru_cache
+
+from PIL import ImageFont
+
+_FONTS = {}
+
+
+def get_font(path, size):
+    """
+    获取 (path, size) 对应的字体，首次调用时加载，之后复用同一对象。
+    加载失败会抛出 OSError（失败结果不缓存，字体文件补上后可再次加载）。
+
+    :param path: TTF 字体文件路径
+    :param size: 字号（像素）
+    :return: ImageFont.FreeTypeFont
+    """
+    key = (path, size)
+    font = _FONTS.get(key)
+    if font is None:
+        font = ImageFont.truetype(path, size)
+        _FONTS[key] = font
+    return font
+
+
+@lru_cache(maxsize=None)
+def default_font():
+    """进程内共享的 PIL 默认字体，字体文件缺失时的回退。"""
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=4096)
+def text_length(font, text):
+    """
+    缓存版 font.getlength，适用于“宜”“忌”、表头标签等反复测量的字符串。
+    :param font: 通过 get_font 获取的字体（按对象身份作为缓存键）
+    :param text: 文本
+    :return: 像素宽度（float）
+    """
+    return font.getlength(text)
+
+
+@lru_cache(maxsize=65536)
+def glyph_advance(font, char):
+    """
+    单个字符的前进宽度，按 (字体, 字符) 缓存。
+    :return: 像素宽度（float）
+    """
+    return font.getlength(char)
+
+
+@lru_cache(maxsize=65536)
+def pair_kerning(font, left, right):
+    """
+    相邻字符对的字距修正：整体宽度与两字宽度之和的差值，绝大多数字符对为 0。
+    :return: 像素修正量（float）
+    """
+    return font.getlength(left + right) - glyph_advance(font, left) - glyph_advance(
+        font, right
+    )
+
+
+def clear_font_cache():
+    """清空字体和宽度缓存（主要用于基准测试和替换字体文件后）。"""
+    _FONTS.clear()
+    default_font.cache_clear()
+    text_length.cache_clear()
+    glyph_advance.cache_clear()
+    pair_kerning.cache_clear()
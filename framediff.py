@@ -0,0 +1,121 @@
+"""
+局部刷新差分帧：只传输与墨水屏当前持有的帧相比发生变化的区域。
+
+同一天内、甚至相邻两天的画面大部分相同（表头布局、边框、圆形、方框），
+差分只包含变化的“脏矩形”。以 2 位打包后的字节为列单位（每字节 4 个像素），
+连续的变化行合并为一个矩形，矩形宽度取这些行中变化字节的并集。
+
+差分结构（小端序）：
+
+    偏移  长度  字段
+    0     4     magic，固定为 b"CFDL"
+    4     1     格式版本，当前为 1
+    5     2     宽度（像素）
+    7     2     高度（像素）
+    9     4     基准帧版本
+    13    4     目标帧版本
+    17    2     矩形个数 N
+    19    ...   N 个矩形，每个为 8 字节头 (y, h, x_byte, w_bytes) + h * w_bytes 字节数据
+
+要求宽度为 4 的倍数（每行恰好对齐到整字节），常见墨水屏分辨率都满足。
+"""
+
+import struct
+
+import numpy as np
+
+from frameformat import FrameFormatError, packed_size
+
+MAGIC = b"CFDL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBHHIIH")
+RECT = struct.Struct("<HHHH")
+
+
+def _rows(frame, width, height):
+    if width % 4:
+        raise FrameFormatError("宽度必须为 4 的倍数才能按行差分")
+    if len(frame) != packed_size(width, height):
+        raise FrameFormatError("数据长度与宽高不符")
+    return np.frombuffer(frame, dtype=np.uint8).reshape(height, width // 4)
+
+
+def dirty_rects(old, new, width, height):
+    """
+    计算两帧之间的脏矩形。
+    :param old: 墨水屏当前持有的 2 位打包帧
+    :param new: 新的 2 位打包帧
+    :return: [(y, h, x_byte, w_bytes)]，坐标以行和字节为单位
+    """
+    changed = _rows(old, width, height) != _rows(new, width, height)
+    changed_rows = np.flatnonzero(changed.any(axis=1))
+    if changed_rows.size == 0:
+        return []
+
+    # 按连续的变化行分段
+    breaks = np.flatnonzero(np.diff(changed_rows) > 1) + 1
+    rects = []
+    for band in np.split(changed_rows, breaks):
+        y, h = int(band[0]), int(band[-1] - band[0] + 1)
+        cols = np.flatnonzero(changed[y : y + h].any(axis=0))
+        x, w = int(cols[0]), int(cols[-1] - cols[0] + 1)
+        rects.append((y, h, x, w))
+    return rects
+
+
+def encode_delta(old, new, width, height, base_version=0, target_version=0):
+    """
+    生成差分帧。
+    :return: bytes
+    """
+    rows = _rows(new, width, height)
+    rects = dirty_rects(old, new, width, height)
+    parts = [
+        HEADER.pack(
+            MAGIC, FORMAT_VERSION, width, height, base_version, target_version, len(rects)
+        )
+    ]
+    for y, h, x, w in rects:
+        parts.append(RECT.pack(y, h, x, w))
+        parts.append(rows[y : y + h, x : x + w].tobytes())
+    return b"".join(parts)
+
+
+def delta_info(delta):
+    """
+    解析差分帧头部。
+    :return: (width, height, base_version, target_version, 矩形个数)
+    """
+    if len(delta) < HEADER.size:
+        raise FrameFormatError("差分帧长度不足")
+    magic, version, width, height, base, target, count = HEADER.unpack_from(delta)
+    if magic != MAGIC:
+        raise FrameFormatError("magic 不匹配")
+    if version != FORMAT_VERSION:
+        raise FrameFormatError(f"不支持的差分格式版本：{version}")
+    return width, height, base, target, count
+
+
+def apply_delta(old, delta):
+    """
+    把差分帧应用到旧帧上（Python 参考实现，墨水屏端按矩形做局部刷新即可）。
+    :param old: 基准帧（2 位打包）
+    :param delta: encode_delta 的输出
+    :return: 新帧 bytes
+    """
+    width, height, _, _, count = delta_info(delta)
+    rows = _rows(old, width, height).copy()
+    pos = HEADER.size
+    for _ in range(count):
+        if pos + RECT.size > len(delta):
+            raise FrameFormatError("矩形头越界")
+        y, h, x, w = RECT.unpack_from(delta, pos)
+        pos += RECT.size
+        if y + h > height or x + w > width // 4:
+            raise FrameFormatError("矩形超出画面")
+        data = delta[pos : pos + h * w]
+        if len(data) != h * w:
+            raise FrameFormatError("矩形数据不足")
+        rows[y : y + h, x : x + w] = np.frombuffer(data, dtype=np.uint8).reshape(h, w)
+        pos += h * w
+    return rows.tobytes()
@@ -0,0 +1,186 @@
+"""
+带版本头的帧格式，支持原始 2 位打包和 PackBits 行程编码。
+
+日历画面大部分是大块白色、整条红色表头和细边框，2 位打包后的字节流中
+长串重复字节很多，用 PackBits 编码通常能压缩到原来的几分之一。
+
+帧结构（小端序，头部 14 字节）：
+
+    偏移  长度  字段
+    0     4     magic，固定为 b"CFRM"
+    4     1     格式版本，当前为 1
+    5     1     编码：0 = 原始 2 位打包，1 = PackBits
+    6     2     宽度（像素）
+    8     2     高度（像素）
+    10    4     负载长度（字节）
+    14    ...   负载
+
+解码后的数据与 packer.pack_image 的输出完全相同（每字节 4 个像素，高位在前）。
+
+PackBits 负载解码（单片机上只需十几行代码）：
+
+    while (in < end) {
+        int8_t n = (int8_t)*in++;
+        if (n >= 0) {            // 字面量：复制后续 n + 1 个字节
+            memcpy(out, in, n + 1); in += n + 1; out += n + 1;
+        } else if (n != -128) {  // 重复：下一个字节重复 1 - n 次
+            memset(out, *in++, 1 - n); out += 1 - n;
+        }
+    }
+"""
+
+import struct
+
+import numpy as np
+
+MAGIC = b"CFRM"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBBHHI")
+
+ENCODING_RAW = 0
+ENCODING_RLE = 1
+ENCODINGS = {"raw": ENCODING_RAW, "rle": ENCODING_RLE}
+
+# PackBits 单个包最多表示 128 个字节
+MAX_PACKET = 128
+# 至少连续 3 个相同字节才值得编码为重复包
+MIN_REPEAT = 3
+
+
+class FrameFormatError(ValueError):
+    """帧头或负载不合法。"""
+
+
+def packed_size(width, height):
+    """2 位打包后的字节数（像素总数不足 4 的倍数时末字节补 0）。"""
+    return (width * height + 3) // 4
+
+
+def rle_encode(data):
+    """
+    PackBits 编码。
+    :param data: bytes（2 位打包后的像素数据）
+    :return: bytes
+    """
+    if not data:
+        return b""
+    arr = np.frombuffer(data, dtype=np.uint8)
+    # 用 numpy 找出所有连续相同字节的区间，再按区间生成数据包
+    starts = np.flatnonzero(np.diff(arr)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.concatenate((starts, [arr.size])))
+
+    out = bytearray()
+
+    def emit_literal(pos, end):
+        while pos < end:
+            count = min(MAX_PACKET, end - pos)
+            out.append(count - 1)
+            out.extend(data[pos : pos + count])
+            pos += count
+
+    literal_start = None
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        if length < MIN_REPEAT:
+            # 短区间累积为字面量
+            if literal_start is None:
+                literal_start = start
+            continue
+        if literal_start is not None:
+            emit_literal(literal_start, start)
+            literal_start = None
+        pos, end = start, start + length
+        while end - pos >= MIN_REPEAT:
+            count = min(MAX_PACKET, end - pos)
+            out.append(257 - count)
+            out.append(data[start])
+            pos += count
+        if pos < end:
+            # 剩余不足 3 个字节，并入后面的字面量
+            literal_start = pos
+    if literal_start is not None:
+        emit_literal(literal_start, arr.size)
+    return bytes(out)
+
+
+def rle_decode(payload, expected_size=None):
+    """
+    PackBits 解码（参考实现，与模块文档中的 C 代码逻辑一致）。
+    :param payload: 编码后的 bytes
+    :param expected_size: 期望的解码长度，不一致时抛出 FrameFormatError
+    :return: bytes
+    """
+    out = bytearray()
+    pos = 0
+    end = len(payload)
+    while pos < end:
+        n = payload[pos]
+        pos += 1
+        if n < 128:
+            count = n + 1
+            if pos + count > end:
+                raise FrameFormatError("字面量包越界")
+            out += payload[pos : pos + count]
+            pos += count
+        elif n != 128:
+            if pos >= end:
+                raise FrameFormatError("重复包缺少数据字节")
+            out += payload[pos : pos + 1] * (257 - n)
+            pos += 1
+    if expected_size is not None and len(out) != expected_size:
+        raise FrameFormatError(f"解码长度 {len(out)} 与期望 {expected_size} 不符")
+    return bytes(out)
+
+
+def encode_frame(packed, width, height, encoding="rle"):
+    """
+    为 2 位打包数据加上帧头，并按指定方式编码。
+    :param packed: packer.pack_image 的输出
+    :param width: 宽度（像素）
+    :param height: 高度（像素）
+    :param encoding: "raw" 或 "rle"
+    :return: bytes（帧头 + 负载）
+    """
+    if len(packed) != packed_size(width, height):
+        raise FrameFormatError("数据长度与宽高不符")
+    code = ENCODINGS[encoding]
+    payload = rle_encode(packed) if code == ENCODING_RLE else bytes(packed)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, code, width, height, len(payload))
+    return header + payload
+
+
+def decode_frame(frame):
+    """
+    解析帧头并解码负载（Python 参考解码器）。
+    :param frame: encode_frame 的输出
+    :return: (width, height, 2 位打包数据)
+    """
+    if len(frame) < HEADER.size:
+        raise FrameFormatError("帧长度不足")
+    magic, version, code, width, height, length = HEADER.unpack_from(frame)
+    if magic != MAGIC:
+        raise FrameFormatError("magic 不匹配")
+    if version != FORMAT_VERSION:
+        raise FrameFormatError(f"不支持的格式版本：{version}")
+    payload = frame[HEADER.size : HEADER.size + length]
+    if len(payload) != length:
+        raise FrameFormatError("负载长度不足")
+
+    expected = packed_size(width, height)
+    if code == ENCODING_RAW:
+        if length != expected:
+            raise FrameFormatError("原始负载长度与宽高不符")
+        return width, height, bytes(payload)
+    if code == ENCODING_RLE:
+        return width, height, rle_decode(payload, expected)
+    raise FrameFormatError(f"未知编码：{code}")
+
+
+def unwrap_frame(data):
+    """
+    取出 2 位打包数据：带帧头的解码，无帧头（原始输出）的原样返回。
+    :return: bytes
+    """
+    if data[: len(MAGIC)] == MAGIC:
+        return decode_frame(data)[2]
+    return bytes(data)
@@ -0,0 +1,266 @@
+"""
+字形图集：把日历中反复出现的有限字符集预先栅格化为 1 位位图，渲染时直接贴图。
+
+日历上的文字几乎都来自一个很小的字表——农历月日、生肖、星座、节气节日、
+宜忌事项和固定的标签文字。每次 draw.text 都要经过 FreeType 栅格化，
+而贴上预先生成的 1 位字形只需一次 paste。图集之外的字符仍由 FreeType 绘制。
+
+图集文件结构（小端序）：
+
+    偏移  长度  字段
+    0     4     magic，固定为 b"CGLA"
+    4     1     格式版本，当前为 1
+    5     2     字号（像素）
+    7     2     行高（多行文本的行距不含额外间距）
+    9     2     字形个数 N
+    11    ...   N 个字形项，每项 16 字节，按码位升序：
+                码位 u32，步进 u16（1/64 像素），x/y 偏移 i16，宽 u8，高 u8，位图偏移 u32
+    ...   ...   位图数据：每个字形逐行存放，每行按字节对齐，高位在前，1 表示着墨
+
+偏移相对于 draw.text 的绘制原点（左上角，锚点 "la"）。
+单片机端可按码位二分查找字形，同样按步进累加画出整行文字（见 compress.atlas_to_c_header）。
+"""
+
+import os
+import struct
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+from fonts import get_font, pair_kerning
+from packer import ink
+
+MAGIC = b"CGLA"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBHHH")
+ENTRY = struct.Struct("<IHhhBBI")
+
+# 覆盖率不低于该值的像素视为着墨（与 packer 对黑字的二值化阈值一致）
+THRESHOLD = 128
+ATLAS_DIR = "./atlas"
+
+# 日历中会出现的字符：日期、农历、生肖、星座、节气节日、宜忌事项和固定文字
+VOCABULARY = "".join(
+    sorted(
+        set(
+            "0123456789年月日星期一二三四五六天"
+            "正七八九十冬腊闰初廿卅"
+            "鼠牛虎兔龙蛇马羊猴鸡狗猪"
+            "白羊金牛双子巨蟹狮处女秤蝎射手摩羯水瓶鱼座"
+            "今日幸运生肖：宜忌"
+            "立春雨惊蛰分清明谷夏小满芒种至暑大秋白露寒霜降雪"
+            "元旦节宵端午中重阳夕除国庆劳动儿童"
+            "祭祀祈福求嗣开光出行解伐木拆卸修造土上梁嫁娶安葬入宅作灶"
+            "纳采订盟冠笄移徙殓破启钻服成碑会亲友进人口财市交易券挂匾"
+            "栽牧养畜屋坏垣理发沐浴扫舍医治病针灸词讼床仓塞穴补平道涂"
+            "合帐裁衣经络门香火坟谢货置产掘井池架竖柱起基定磉教捕捉畋猎"
+            "结网取渔放渠诸事不余勿"
+            "是谁在加班？温暖了寂寞！"
+            "，。！？、（）()"
+        )
+    )
+)
+
+
+class GlyphAtlas:
+    """
+    一种字体、一个字号的字形图集。
+    glyphs: {字符: (1 位位图 Image, x 偏移, y 偏移)}，advances: {字符: 步进（像素）}
+    """
+
+    def __init__(self, size, line_height, glyphs, advances, font=None):
+        self.size = size
+        self.line_height = line_height
+        self.glyphs = glyphs
+        self.advances = advances
+        # 用于图集之外的字符和字距修正，从文件加载且未提供时两者都跳过
+        self.font = font
+
+    @classmethod
+    def build(cls, font, chars=VOCABULARY, threshold=THRESHOLD):
+        """
+        用 FreeType 把 chars 中的字符逐个栅格化为 1 位位图。
+        :param font: ImageFont.FreeTypeFont
+        :return: GlyphAtlas
+        """
+        glyphs = {}
+        advances = {}
+        for char in chars:
+            advances[char] = font.getlength(char)
+            left, top, right, bottom = font.getbbox(char)
+            if right <= left or bottom <= top:
+                continue  # 空白字符只有步进
+            coverage = Image.new("L", (right - left, bottom - top), 0)
+            ImageDraw.Draw(coverage).text((-left, -top), char, fill=255, font=font)
+            bitmap = coverage.point(lambda v: 255 if v >= threshold else 0).convert("1")
+            glyphs[char] = (bitmap, left, top)
+        line_height = font.getbbox("A")[3]
+        return cls(font.size, line_height, glyphs, advances, font)
+
+    def __contains__(self, char):
+        return char in self.advances
+
+    def draw_text(self, image, draw, xy, text, fill, spacing=4):
+        """
+        在 image 上绘制文本（支持 "\\n" 换行，行距同 draw.text）。
+        图集中的字符直接贴图，其余字符交给 FreeType（需要 self.font）。
+        """
+        x, y = xy
+        fill = ink(image, fill)
+        line_step = self.line_height + spacing
+        for line in text.split("\n"):
+            pen = x
+            previous = None
+            for char in line:
+                if previous is not None and self.font is not None:
+                    pen += pair_kerning(self.font, previous, char)
+                previous = char
+                if char in self.advances:
+                    glyph = self.glyphs.get(char)
+                    if glyph is not None:
+                        bitmap, left, top = glyph
+                        image.paste(fill, (int(pen) + left, int(y) + top), bitmap)
+                    pen += self.advances[char]
+                elif self.font is not None:
+                    draw.text((pen, y), char, fill=fill, font=self.font)
+                    pen += self.font.getlength(char)
+            y += line_step
+
+    def to_bytes(self):
+        """序列化为图集文件内容（见模块文档）。"""
+        entries = []
+        bitmaps = bytearray()
+        for char in sorted(self.advances, key=ord):
+            glyph = self.glyphs.get(char)
+            advance = round(self.advances[char] * 64)
+            if glyph is None:
+                entries.append(ENTRY.pack(ord(char), advance, 0, 0, 0, 0, len(bitmaps)))
+                continue
+            bitmap, left, top = glyph
+            entries.append(
+                ENTRY.pack(ord(char), advance, left, top, *bitmap.size, len(bitmaps))
+            )
+            bitmaps += bitmap.tobytes()
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, self.size, self.line_height, len(entries))
+        return header + b"".join(entries) + bytes(bitmaps)
+
+    @classmethod
+    def from_bytes(cls, data, font=None):
+        """
+        解析图集文件内容。
+        :param font: 可选，对应的 FreeTypeFont，用于图集之外的字符
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("图集长度不足")
+        magic, version, size, line_height, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("magic 不匹配")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"不支持的图集版本：{version}")
+        bitmap_base = HEADER.size + count * ENTRY.size
+        glyphs = {}
+        advances = {}
+        for i in range(count):
+            code, advance, left, top, width, height, offset = ENTRY.unpack_from(
+                data, HEADER.size + i * ENTRY.size
+            )
+            char = chr(code)
+            advances[char] = advance / 64
+            if width and height:
+                start = bitmap_base + offset
+                length = (width + 7) // 8 * height
+                bitmap = Image.frombytes("1", (width, height), data[start : start + length])
+                glyphs[char] = (bitmap, left, top)
+        return cls(size, line_height, glyphs, advances, font)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path, font=None):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read(), font)
+
+
+class AtlasDraw:
+    """
+    ImageDraw 的替身：text() 对有图集的字体直接贴图，其余绘制调用原样交给 ImageDraw。
+    """
+
+    def __init__(self, image, atlases):
+        """
+        :param image: 目标 PIL.Image
+        :param atlases: {FreeTypeFont: GlyphAtlas}
+        """
+        self.image = image
+        self.draw = ImageDraw.Draw(image)
+        self.atlases = atlases
+
+    def text(self, xy, text, fill=None, font=None, spacing=4, **kwargs):
+        atlas = self.atlases.get(font)
+        if atlas is None or kwargs:
+            return self.draw.text(xy, text, fill=fill, font=font, spacing=spacing, **kwargs)
+        atlas.draw_text(self.image, self.draw, xy, text, fill, spacing)
+
+    def __getattr__(self, name):
+        return getattr(self.draw, name)
+
+
+def atlas_path(font_path, size, directory=ATLAS_DIR):
+    """图集文件路径：{directory}/{字体文件名}-{字号}.cgla"""
+    stem = os.path.splitext(os.path.basename(font_path))[0]
+    return os.path.join(directory, f"{stem}-{size}.cgla")
+
+
+@lru_cache(maxsize=None)
+def get_atlas(font_path, size):
+    """
+    获取 (字体, 字号) 的图集：atlas/ 下有比字体文件新的图集文件时直接加载，否则现场生成。
+    字体加载失败时抛出 OSError（由调用方回退到 FreeType 绘制）。
+    """
+    font = get_font(font_path, size)
+    path = atlas_path(font_path, size)
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(font_path):
+            return GlyphAtlas.load(path, font)
+    except (OSError, ValueError):
+        pass
+    return GlyphAtlas.build(font)
+
+
+def build_atlas_files(font_sizes, directory=ATLAS_DIR):
+    """
+    为 [(字体路径, 字号)] 生成图集文件。
+    :return: 写入的文件路径列表
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for font_path, size in sorted(set(font_sizes)):
+        try:
+            atlas = GlyphAtlas.build(get_font(font_path, size))
+        except OSError:
+            print(f"字体文件未找到，跳过：{font_path}")
+            continue
+        path = atlas_path(font_path, size, directory)
+        atlas.save(path)
+        written.append(path)
+        print(f"已生成图集：{path}（{len(atlas.glyphs)} 个字形）")
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from layout import available_layouts, load_layout
+
+    parser = argparse.ArgumentParser(description="为布局中用到的字体和字号生成字形图集")
+    parser.add_argument("--layout", action="append", help="布局名，默认全部")
+    parser.add_argument("--out", default=ATLAS_DIR, help="输出目录")
+    args = parser.parse_args()
+
+    font_sizes = []
+    for name in args.layout or available_layouts():
+        for font_spec in load_layout(name)["fonts"].values():
+            font_sizes.append((font_spec["path"], font_spec["size"]))
+    build_atlas_files(font_sizes, args.out)
@@ -0,0 +1,480 @@
+"""
+声明式布局：用 JSON 描述不同尺寸墨水屏上各元素的位置和字号，编译为可复用的渲染计划。
+
+布局文件放在 layouts/ 目录下，每个面板尺寸一个（2.9in、4.2in、7.5in）。
+画面结构对所有尺寸相同——表头（公历日期、生肖、星座）、农历月日和节日、
+左右两栏宜忌、底部方框（周末提示图或一言）——布局文件只给出坐标、字号和间距：
+
+    {
+        "name": "4.2in",
+        "size": [400, 300],
+        "fonts": {"super": {"path": "./font/hu.ttf", "size": 40}, ...},
+        "line_spacing": 4,
+        "header": {"height": 50, "date_y": 5, "info_y": 30, "info_margin": 30},
+        "lunar": {"y": 75, "festival_gap": 10},
+        "columns": {"yi_x": 75, "ji_x": 325, "y": 90, "circle_padding": 15,
+                    "gap": 10, "text_offset": 50, "text_width": 100},
+        "box": {"margin": 5, "inner_margin": 10, "radius": 10, "width": 3},
+        "border": 3,
+        "weekend": {"asset": "./assets/weekend.bmp", "x": 50, "text_gap": 40,
+                    "text": "是谁在加班？\\n温暖了寂寞！"},
+        "hitokoto": {"x": 40, "width": 320}
+    }
+
+header.info_y、box、weekend、hitokoto 为 null 或省略时不绘制对应部分（小尺寸面板放不下）。
+
+编译后的 RenderPlan 持有已加载的字体（经 fonts.py 注册表，各尺寸共享）、
+预先绘制好的静态底图和按方框高度缓存的边框蒙版，每帧只绘制当天的文字。
+一次抓取的数据可以用 render_panels 依次渲染到所有尺寸。
+"""
+
+import datetime
+import json
+import os
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+from fonts import default_font, get_font, glyph_advance, pair_kerning, text_length
+from glyphatlas import AtlasDraw, get_atlas
+from packer import ink, new_indexed_image
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layouts")
+DEFAULT_LAYOUT = "4.2in"
+ELLIPSIS = "…"
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+
+# 每帧绘制所需的当日数据字段（与 script.parse_day_pages 的输出一致）
+DAY_FIELDS = (
+    "solar_date",
+    "lucky_zodiac",
+    "lucky_constellation",
+    "yi_list",
+    "ji_list",
+    "lunar_month",
+    "lunar_day",
+    "today_text",
+)
+
+# 边框蒙版按方框起始高度缓存的上限
+MAX_FRAME_MASKS = 64
+
+# 已提示过缺失的字体文件，避免每个布局重复提示
+_MISSING_FONTS = set()
+
+
+def wrap_text_cn(text, font, max_width):
+    """
+    手动将中文文本按像素宽度换行，确保不超过最大宽度。
+
+    :param text: 待换行的文本
+    :param font: PIL ImageFont 对象，用于测量字体宽度
+    :param max_width: 最大允许的像素宽度
+    :return: 换行后的文本列表
+    """
+    wrapped_lines = []
+    line = ""
+    line_width = 0
+    for char in text:
+        if char != "\n":
+            # 增量计算行宽：已有行宽 + 字距修正 + 新字符宽度，避免反复测量整行
+            char_width = glyph_advance(font, char)
+            if line:
+                char_width += pair_kerning(font, line[-1], char)
+            if line_width + char_width <= max_width:
+                line += char
+                line_width += char_width
+                continue
+        wrapped_lines.append(line.strip())
+        if char != "\n":
+            line = char
+            line_width = glyph_advance(font, char)
+        else:
+            line = ""
+            line_width = 0
+    if line:
+        wrapped_lines.append(line.strip())
+    return wrapped_lines
+
+
+def truncate_lines(lines, font, max_width, max_lines):
+    """
+    最多保留 max_lines 行；有行被截掉时在最后一行末尾加省略号（放不下时去掉行尾的字）。
+
+    :param lines: wrap_text_cn 的结果
+    :return: 截断后的行列表
+    """
+    if len(lines) <= max_lines:
+        return lines
+    if max_lines <= 0:
+        return []
+    last = lines[max_lines - 1]
+    while last and text_length(font, last + ELLIPSIS) > max_width:
+        last = last[:-1]
+    return lines[: max_lines - 1] + [last.rstrip() + ELLIPSIS]
+
+
+@lru_cache(maxsize=None)
+def load_asset(path, indexed=False):
+    """
+    周末提示图片等素材（已转为 1 位），打开失败时抛出 OSError 且不缓存。
+    indexed 为 True 时转为三色调色板的 P 模式图片（黑白像素对应调色板索引 1 / 0），
+    可直接贴到 P 模式画布上。
+    """
+    with Image.open(path) as img:
+        bitmap = img.convert("1")
+    if not indexed:
+        return bitmap
+    asset = new_indexed_image(bitmap.size)
+    asset.paste(ink(asset, BLACK), mask=bitmap.convert("L").point(lambda v: 255 - v))
+    return asset
+
+
+def load_layout(name_or_path):
+    """
+    读取布局描述。
+    :param name_or_path: layouts/ 下的布局名（如 "7.5in"）或 JSON 文件路径
+    :return: dict
+    """
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(LAYOUT_DIR, f"{name_or_path}.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def available_layouts():
+    """layouts/ 目录下的全部布局名。"""
+    return sorted(
+        os.path.splitext(name)[0]
+        for name in os.listdir(LAYOUT_DIR)
+        if name.endswith(".json")
+    )
+
+
+class RenderPlan:
+    """
+    编译后的布局：字体、静态底图和坐标都已就绪，可反复调用 render 渲染每天的画面。
+    """
+
+    def __init__(self, spec, glyph_atlas=False, palette=False):
+        """
+        :param spec: load_layout 返回的布局描述
+        :param glyph_atlas: 是否用预先栅格化的字形图集绘制文字（见 glyphatlas.py），
+                            布局中 "glyph_atlas": true 也可开启
+        :param palette: 是否直接在三色调色板（P 模式）画布上绘制：文字不做抗锯齿，
+                        打包时只需把调色板索引转成位（见 packer.quantize）
+        """
+        self.name = spec["name"]
+        self.palette = palette
+        self.width, self.height = spec["size"]
+        self.line_spacing = spec.get("line_spacing", 4)
+        self.header = spec["header"]
+        self.lunar = spec["lunar"]
+        self.columns = spec["columns"]
+        self.box = spec.get("box")
+        self.border = spec.get("border", 3)
+        self.weekend = spec.get("weekend") if self.box else None
+        self.hitokoto = spec.get("hitokoto") if self.box else None
+
+        # 字体经 fonts.py 注册表加载，同一 (路径, 字号) 在各尺寸之间共享；
+        # 行高使用布局中声明的字号，加载失败回退到默认字体时也保持版面不变
+        self.fonts = {}
+        self.heights = {}
+        self.atlases = {}
+        glyph_atlas = glyph_atlas or spec.get("glyph_atlas", False)
+        for role, font_spec in spec["fonts"].items():
+            try:
+                self.fonts[role] = get_font(font_spec["path"], font_spec["size"])
+            except IOError:
+                if font_spec["path"] not in _MISSING_FONTS:
+                    _MISSING_FONTS.add(font_spec["path"])
+                    print(f"字体文件未找到，使用默认字体：{font_spec['path']}")
+                self.fonts[role] = default_font()
+            else:
+                if glyph_atlas:
+                    atlas = get_atlas(font_spec["path"], font_spec["size"])
+                    self.atlases[self.fonts[role]] = atlas
+            self.heights[role] = font_spec["size"]
+
+        self.static = self._draw_static()
+        self._frame_masks = {}
+
+    def _draw_static(self):
+        """静态底图：红色表头背景、“宜”“忌”圆形及其文字。"""
+        image = self._new_canvas()
+        draw = self._drawer(image)
+        draw.rectangle([0, 0, self.width, self.header["height"]], fill=RED)
+
+        font_large = self.fonts["large"]
+        columns = self.columns
+        radius = font_large.size // 2 + columns["circle_padding"]
+        y = columns["y"]
+        for x, glyph, bg_color in ((columns["yi_x"], "宜", RED), (columns["ji_x"], "忌", BLACK)):
+            draw.circle((x, y), radius, fill=bg_color)
+            glyph_width = text_length(font_large, glyph)
+            draw.text(
+                (x - glyph_width // 2, y - font_large.size // 2),
+                glyph,
+                fill=WHITE,
+                font=font_large,
+            )
+        return image
+
+    def _new_canvas(self):
+        if self.palette:
+            return new_indexed_image((self.width, self.height))
+        return Image.new("RGB", (self.width, self.height), WHITE)
+
+    def _drawer(self, image):
+        """开启字形图集时文字改为贴图，其余绘制不变。"""
+        if self.atlases:
+            return AtlasDraw(image, self.atlases)
+        return ImageDraw.Draw(image)
+
+    def frame_mask(self, box_y_start):
+        """
+        双线圆角方框和外边框的蒙版（只取决于方框起始高度），
+        绘制在当天内容之上。
+        """
+        mask = self._frame_masks.get(box_y_start)
+        if mask is not None:
+            return mask
+
+        width, height = self.width, self.height
+        mask = Image.new("1", (width, height), 0)
+        draw = ImageDraw.Draw(mask)
+        if self.box and box_y_start is not None:
+            # draw a double rectangle box
+            margin = self.box["margin"]
+            inner = self.box["inner_margin"]
+            draw.rounded_rectangle(
+                [margin, box_y_start, width - margin, height - margin],
+                radius=self.box["radius"],
+                outline=1,
+                width=self.box["width"],
+            )
+            draw.rounded_rectangle(
+                [inner, box_y_start + inner - margin, width - inner, height - inner],
+                radius=self.box["radius"],
+                outline=1,
+            )
+        draw.rectangle([0, 0, width, height], outline=1, width=self.border)
+
+        if len(self._frame_masks) >= MAX_FRAME_MASKS:
+            self._frame_masks.clear()
+        self._frame_masks[box_y_start] = mask
+        return mask
+
+    def render(
+        self,
+        solar_date,
+        lucky_zodiac,
+        lucky_constellation,
+        yi_list,
+        ji_list,
+        lunar_month,
+        lunar_day,
+        today_text,
+        hitokoto=None,
+        day=None,
+    ):
+        """
+        绘制一天的画面，返回 PIL.Image 对象（参数同 script.create_calendar_image）。
+        """
+        width = self.width
+        font_super = self.fonts["super"]
+        font_large = self.fonts["large"]
+        font_medium = self.fonts["medium"]
+        font_small = self.fonts["small"]
+        font_small_height = self.heights["small"]
+        line_spacing = self.line_spacing
+        text_color = BLACK
+
+        # 表头背景、宜忌圆形等静态部分来自预先绘制的底图
+        image = self.static.copy()
+        draw = self._drawer(image)
+
+        # 去除 "(阳历)" 并绘制
+        header = self.header
+        solar_date = solar_date.replace("(阳历)", "").strip()
+        solar_date_width = text_length(font_medium, solar_date)
+        draw.text(
+            ((width - solar_date_width) // 2, header["date_y"]),
+            solar_date,
+            fill=WHITE,
+            font=font_medium,
+        )
+
+        # 绘制幸运生肖和星座
+        if header.get("info_y") is not None:
+            info_y, info_margin = header["info_y"], header["info_margin"]
+            l_zodiac = "今日幸运生肖：" + lucky_zodiac
+            draw.text((info_margin, info_y), l_zodiac, fill=WHITE, font=font_small)
+            l_constellation = "今日星座：" + lucky_constellation
+            lucky_constellation_width = text_length(font_small, l_constellation)
+            draw.text(
+                (width - lucky_constellation_width - info_margin, info_y),
+                l_constellation,
+                fill=WHITE,
+                font=font_small,
+            )
+
+        # 绘制农历月份和农历日期
+        lunar_y = self.lunar["y"]
+        font_super_height = font_super.size
+        lunar_month_width = text_length(font_super, lunar_month)
+        lunar_day_width = text_length(font_super, lunar_day)
+        draw.text(
+            ((width - lunar_month_width) / 2, lunar_y),
+            lunar_month,
+            fill=text_color,
+            font=font_super,
+        )
+        draw.text(
+            ((width - lunar_day_width) / 2, lunar_y + font_super_height),
+            lunar_day,
+            fill=text_color,
+            font=font_super,
+        )
+        bottom_of_lunar = lunar_y + 2 * font_super_height
+
+        # 如果有 today_text 信息（如节日）
+        if today_text:
+            gap = self.lunar["festival_gap"]
+            today_text_width = text_length(font_medium, today_text)
+            draw.text(
+                ((width - today_text_width) / 2, lunar_y + 2 * font_super_height + gap),
+                today_text,
+                fill=RED,
+                font=font_medium,
+            )
+            bottom_of_lunar += font_medium.size + gap
+
+        # 分行绘制宜忌事项（圆形已在静态底图中）
+        columns = self.columns
+        start_y = (
+            columns["y"] + font_large.size // 2 + columns["circle_padding"] + columns["gap"]
+        )
+        # 每栏最多放得下的行数，超出的截断（小尺寸面板放不下较长的宜忌列表）
+        max_lines = (self.height - self.border - start_y) // (font_small_height + line_spacing)
+        last_height = bottom_of_lunar
+        for x, items in ((columns["yi_x"], yi_list), (columns["ji_x"], ji_list)):
+            wrapped = truncate_lines(
+                wrap_text_cn(items, font_small, columns["text_width"]),
+                font_small,
+                columns["text_width"],
+                max_lines,
+            )
+            draw.text(
+                (x - columns["text_offset"], start_y),
+                "\n".join(wrapped),
+                fill=text_color,
+                font=font_small,
+                spacing=line_spacing,
+            )
+            column_height = (
+                start_y
+                + font_small_height * len(wrapped)
+                + line_spacing * (len(wrapped) - 1)
+            )
+            last_height = max(last_height, column_height)
+
+        box_y_start = None
+        if self.box:
+            box_y_start = last_height + font_small_height
+            day = day or datetime.date.today()
+            if day.weekday() in [5, 6]:
+                self._draw_weekend(image, draw, box_y_start)
+            elif hitokoto:
+                self._draw_hitokoto(draw, hitokoto, box_y_start)
+
+        # 双线方框和外边框覆盖在内容之上
+        image.paste(ink(image, RED), mask=self.frame_mask(box_y_start))
+        return image
+
+    def _draw_weekend(self, image, draw, box_y_start):
+        if not self.weekend:
+            return
+        font_small_height = self.heights["small"]
+        font_art_height = self.heights["art"]
+        try:
+            img_weekend = load_asset(self.weekend["asset"], self.palette)
+        except IOError:
+            print("周末提示图片不存在或无法打开。")
+            return
+        x = self.weekend["x"]
+        image.paste(img_weekend, (x, box_y_start + font_small_height // 2))
+        draw.text(
+            (
+                x + img_weekend.width + self.weekend["text_gap"],
+                box_y_start
+                + font_small_height // 2
+                + img_weekend.height // 2
+                - font_art_height,
+            ),
+            self.weekend["text"],
+            fill=BLACK,
+            font=self.fonts["art"],
+        )
+
+    def _draw_hitokoto(self, draw, hitokoto, box_y_start):
+        # 非周末，绘制 hitokoto 一言（由抓取阶段提前取得）
+        hitokoto = hitokoto.strip()
+        if not self.hitokoto or not hitokoto:
+            return
+        font_art = self.fonts["art"]
+        font_art_height = self.heights["art"]
+        line_spacing = self.line_spacing
+        # 一言在方框内垂直居中
+        center_y = ((self.height - self.box["margin"]) + box_y_start) // 2
+        lines = wrap_text_cn(hitokoto, font_art, self.hitokoto["width"])
+        if len(lines) > 1:
+            y_position = center_y - (
+                font_art_height * len(lines) + line_spacing * (len(lines) - 1)
+            ) // 2
+            draw.text(
+                (self.hitokoto["x"], y_position),
+                "\n".join(lines),
+                fill=BLACK,
+                font=font_art,
+                spacing=line_spacing,
+            )
+        else:
+            text_width = text_length(font_art, lines[0])
+            draw.text(
+                ((self.width - text_width) / 2, center_y - font_art_height // 2),
+                lines[0],
+                fill=BLACK,
+                font=font_art,
+            )
+
+    def render_day(self, day_data, hitokoto=None, day=None):
+        """
+        用 parse_day_pages / DayCache 返回的当日数据渲染。
+        :return: PIL.Image
+        """
+        return self.render(*(day_data[field] for field in DAY_FIELDS), hitokoto, day)
+
+
+@lru_cache(maxsize=None)
+def get_plan(name=DEFAULT_LAYOUT, glyph_atlas=False, palette=False):
+    """按布局名（或路径）编译渲染计划，同一进程内只编译一次。"""
+    return RenderPlan(load_layout(name), glyph_atlas, palette)
+
+
+def render_panels(names, day_data, hitokoto=None, day=None, glyph_atlas=False, palette=False):
+    """
+    用同一份当日数据为多个面板尺寸渲染画面（字体和解析结果在各尺寸之间共享）。
+    :param names: 布局名列表
+    :param glyph_atlas: 是否使用字形图集绘制文字
+    :param palette: 是否直接渲染为三色调色板（P 模式）图片
+    :return: {布局名: PIL.Image}
+    """
+    return {
+        name: get_plan(name, glyph_atlas, palette).render_day(day_data, hitokoto, day)
+        for name in names
+    }
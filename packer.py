@@ -0,0 +1,226 @@
+import numpy as np
+from PIL import Image
+
+# 定义颜色映射表（2 位表示一个像素）
+COLOR_MAP = {
+    (255, 255, 255): 0b00,  # 白色
+    (0, 0, 0): 0b01,  # 黑色
+    (255, 0, 0): 0b10,  # 红色
+}
+
+# 三色调色板：调色板索引与 2 位编码相同（0 白 / 1 黑 / 2 红），
+# 直接在 P 模式画布上绘制时，打包只需把索引转成位，无需逐像素匹配颜色
+PALETTE = [
+    channel
+    for color, _ in sorted(COLOR_MAP.items(), key=lambda item: item[1])
+    for channel in color
+]
+
+# 抖动方式（照片、插画等非纯色图片）：
+#   nearest          映射到最近的调色板颜色（Pillow 的调色板匹配），不抖动
+#   ordered          8x8 Bayer 有序抖动，逐像素独立计算，结果与分块无关
+#   floyd-steinberg  误差扩散（Pillow 的 C 实现）
+# 为 None 时沿用灰度阈值二值化（非调色板颜色只会变成黑或白）
+DITHER_MODES = ("nearest", "ordered", "floyd-steinberg")
+# 有序抖动的扰动幅度（RGB 单位）；调色板颜色间距很大，取半个色阶左右
+ORDERED_SPREAD = 128
+
+# 每个字节容纳的像素数（每个像素占 2 位）
+PIXELS_PER_BYTE = 4
+# 流式打包时每个条带的像素数（约 32 行 400 像素），条带行数按图片宽度换算
+BAND_PIXELS = 12800
+
+
+def _bayer_matrix(order):
+    """2^order 阶 Bayer 矩阵，归一化到 [-0.5, 0.5)。"""
+    matrix = np.zeros((1, 1), dtype=np.float32)
+    for _ in range(order):
+        matrix = np.block(
+            [[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]]
+        )
+    return (matrix + 0.5) / matrix.size - 0.5
+
+
+BAYER = _bayer_matrix(3)
+ORDERED_OFFSETS = np.round(ORDERED_SPREAD * BAYER).astype(np.int16)
+
+
+def new_indexed_image(size):
+    """创建使用三色调色板的 P 模式白色画布（每像素 1 字节，RGB 画布的 1/3）。"""
+    img = Image.new("P", size, 0)
+    img.putpalette(PALETTE)
+    return img
+
+
+# Image.quantize 所用的调色板图片
+_PALETTE_IMAGE = new_indexed_image((1, 1))
+
+
+def ink(img, color):
+    """
+    将 RGB 颜色转换为 img 可用的填充值：P 模式下为调色板索引，其余模式原样返回。
+    （ImageDraw 会自动转换，Image.paste 不会。）
+    """
+    if img.mode == "P" and isinstance(color, tuple):
+        return img.palette.getcolor(color, img)
+    return color
+
+
+def palette_lut(img, threshold=128):
+    """
+    P 模式图片的“调色板索引 -> 2 位编码”查找表，规则与 quantize 对 RGB 像素的处理相同。
+    :return: 长度 256 的 uint8 数组
+    """
+    palette = img.getpalette() or []
+    palette = palette[: 256 * 3] + [0] * (256 * 3 - len(palette))
+    rgb = np.array(palette, dtype=np.uint8).reshape(256, 3)
+    gray = 0.299 * rgb[:, 0] + 0.587 * rgb[:, 1] + 0.114 * rgb[:, 2]
+    lut = (gray < threshold).astype(np.uint8)
+    for index, color in enumerate(map(tuple, rgb.tolist())):
+        if color in COLOR_MAP:
+            lut[index] = COLOR_MAP[color]
+    return lut
+
+
+def dither_codes(img, dither):
+    """
+    按 DITHER_MODES 中的方式把图片映射到三色调色板。
+    颜色匹配和误差扩散都交给 Pillow 的 C 实现（Image.quantize），
+    有序抖动只需先用 numpy 叠加 Bayer 扰动。
+
+    :return: 形状为 (height, width) 的 uint8 编码数组
+    """
+    if dither not in DITHER_MODES:
+        raise ValueError(f"unknown dither mode: {dither}")
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if dither == "ordered":
+        width, height = img.size
+        size = BAYER.shape[0]
+        offsets = np.tile(ORDERED_OFFSETS, (height // size + 1, width // size + 1))
+        rgb = np.asarray(img, dtype=np.int16) + offsets[:height, :width, None]
+        img = Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), "RGB")
+    method = Image.Dither.FLOYDSTEINBERG if dither == "floyd-steinberg" else Image.Dither.NONE
+    # 调色板索引与 2 位编码相同，量化结果即编码
+    return np.asarray(img.quantize(palette=_PALETTE_IMAGE, dither=method))
+
+
+def quantize(img, threshold=128, dither=None):
+    """
+    将图片映射为调色板编码数组（0b00 白 / 0b01 黑 / 0b10 红）。
+    不在 COLOR_MAP 中的颜色按灰度阈值二值化为黑或白；
+    指定 dither 时改为映射到最近的调色板颜色（可抖动），红色等彩色得以保留。
+
+    :param img: PIL.Image 对象（P 模式按调色板查表，其余模式内部转换为 RGB）
+    :param threshold: 二值化灰度阈值（默认 128，dither 为 None 时有效）
+    :param dither: None 或 DITHER_MODES 之一
+    :return: 形状为 (height, width) 的 uint8 数组
+    """
+    if dither is not None:
+        return dither_codes(img, dither)
+    if img.mode == "P":
+        # 只需按索引查表，不必展开为 RGB 再逐像素匹配
+        return palette_lut(img, threshold)[np.asarray(img)]
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    rgb = np.asarray(img)
+
+    # 与逐像素实现保持一致：float64 计算灰度，int() 截断后比较等价于直接比较
+    gray = 0.299 * rgb[..., 0] + 0.587 * rgb[..., 1] + 0.114 * rgb[..., 2]
+    codes = (gray < threshold).astype(np.uint8)  # 0b00 白 / 0b01 黑
+
+    # 将 RGB 合成 24 位整数，一次比较即可匹配调色板颜色
+    key = rgb.astype(np.uint32)
+    key = (key[..., 0] << 16) | (key[..., 1] << 8) | key[..., 2]
+    for (r, g, b), bits in COLOR_MAP.items():
+        codes[key == ((r << 16) | (g << 8) | b)] = bits
+    return codes
+
+
+def pack_codes(codes):
+    """
+    将 2 位编码数组按行优先顺序打包为字节，每字节 4 个像素，高位在前。
+    像素总数不是 4 的倍数时，最后一个字节低位补 0。
+
+    :param codes: 调色板编码数组
+    :return: bytes
+    """
+    flat = np.ravel(codes).astype(np.uint8, copy=False)
+    remainder = flat.size % PIXELS_PER_BYTE
+    if remainder:
+        flat = np.concatenate(
+            [flat, np.zeros(PIXELS_PER_BYTE - remainder, dtype=np.uint8)]
+        )
+    quads = flat.reshape(-1, PIXELS_PER_BYTE)
+    packed = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+    return packed.astype(np.uint8).tobytes()
+
+
+def pack_image(img, threshold=128, dither=None):
+    """
+    对图片做调色板匹配、二值化并压缩为 2 位/像素的字节串。
+
+    :param img: PIL.Image 对象
+    :param threshold: 二值化灰度阈值（默认 128）
+    :param dither: 抖动方式，见 quantize
+    :return: bytes
+    """
+    return pack_codes(quantize(img, threshold, dither))
+
+
+def iter_packed(img, threshold=128, band_rows=None, dither=None):
+    """
+    流式打包：每次处理一个条带并立即产出打包后的字节，
+    工作内存只与条带大小有关，与整幅图片的分辨率无关。
+    拼接所有产出的字节与 pack_image 的结果完全相同。
+
+    :param img: PIL.Image 对象
+    :param threshold: 二值化灰度阈值（默认 128）
+    :param band_rows: 每个条带的行数，默认按 BAND_PIXELS 换算
+    :param dither: 抖动方式，见 quantize；误差扩散跨越条带，因此先整幅量化再分条带打包
+    :return: 生成器，逐条带产出 bytes
+    """
+    width, height = img.size
+    band_rows = band_rows or max(1, BAND_PIXELS // width)
+    dithered = quantize(img, threshold, dither) if dither is not None else None
+    # 宽度不是 4 的倍数时，条带末尾不足一个字节的像素留到下一条带
+    carry = np.zeros(0, dtype=np.uint8)
+    for top in range(0, height, band_rows):
+        if dithered is None:
+            band = quantize(img.crop((0, top, width, min(top + band_rows, height))), threshold)
+        else:
+            band = dithered[top : top + band_rows]
+        codes = np.concatenate([carry, band.ravel()])
+        usable = codes.size - codes.size % PIXELS_PER_BYTE
+        carry = codes[usable:]
+        if usable:
+            yield pack_codes(codes[:usable])
+    if carry.size:
+        yield pack_codes(carry)
+
+
+def write_packed(img, stream, threshold=128, band_rows=None, dither=None):
+    """
+    流式打包并逐条带写入二进制文件（任何带 write 方法的对象，如 open(path, "wb")）。
+    :return: 写入的字节数
+    """
+    written = 0
+    for chunk in iter_packed(img, threshold, band_rows, dither):
+        stream.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def pack_file(image_path, threshold=128, dither=None):
+    """
+    打开图片文件并压缩为 2 位/像素的字节串。
+
+    :param image_path: 输入图片路径
+    :param threshold: 二值化灰度阈值（默认 128）
+    :param dither: 抖动方式，见 quantize
+    :return: (bytes, width, height)
+    """
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+    width, height = img.size
+    return pack_image(img, threshold, dither), width, height
@@ -0,0 +1,204 @@
+"""
+按墨水屏按需渲染：每块屏在请求行中报告设备 ID 和分辨率，服务器为它渲染对应布局的帧。
+
+    FRAME device=kitchen size=800x480
+
+配置按以下顺序确定：请求中的 layout=，其次 size= 对应的布局（见 layouts/），
+再次 devices.json 中该设备的配置，最后是默认布局。devices.json 形如：
+
+    {"kitchen": {"layout": "7.5in", "palette": true, "glyph_atlas": true}}
+
+渲染结果按 (日期, 配置) 缓存在有界 LRU 中；同一配置的并发请求只触发一次渲染，
+其余请求等待同一个结果（single-flight）。渲染在单独的线程中串行执行，不阻塞事件循环。
+"""
+
+import asyncio
+import datetime
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from daycache import DayCache
+from layout import DEFAULT_LAYOUT, available_layouts, get_plan, load_layout
+from packer import pack_image
+
+RENDER_CACHE_SIZE = 64  # 最多缓存的 (日期, 配置) 帧数
+DAY_DATA_DAYS = 3  # 内存中保留最近几天的数据
+DEVICES_FILE = "devices.json"
+# 请求中出现任一参数即视为按屏渲染请求
+PANEL_PARAMS = ("device", "size", "layout")
+
+
+def load_devices(path=DEVICES_FILE):
+    """
+    读取设备配置。
+    :return: {设备 ID: 配置 dict}，文件不存在时返回空 dict
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def layouts_by_size():
+    """{(宽, 高): 布局名}"""
+    return {tuple(load_layout(name)["size"]): name for name in available_layouts()}
+
+
+def fetch_day(day, day_data=None, session=None):
+    """
+    联网取得某天的数据和一言（当天已有缓存时只取一言）。
+    :param session: 复用的 requests.Session，为 None 时每次新建
+    :return: (当日数据或 None, 一言或 None)
+    """
+    # 延迟导入：只有缓存缺失时才需要抓取相关的依赖
+    import script
+
+    urls = {} if day_data is not None else script.day_urls(day)
+    if day == datetime.date.today() and day.weekday() not in [5, 6]:
+        urls["hitokoto"] = script.URL_HITOKOTO
+    pages = script.fetch_sources(urls, session) if urls else {}
+    if day_data is None:
+        day_data = script.parse_day_pages(pages)
+    return day_data, pages.get("hitokoto")
+
+
+class DaySource:
+    """
+    渲染所需的当日数据和一言，每天只取一次并留在内存中。
+    先查 DayCache，缺失的部分由 fetch 补齐（默认联网，测试和压测时可替换）。
+    """
+
+    def __init__(self, cache=None, fetch=fetch_day):
+        self.cache = cache or DayCache()
+        self.fetch = fetch
+        self.days = OrderedDict()
+
+    def get(self, day):
+        """
+        :return: (当日数据, 一言或 None)
+        :raises LookupError: 取不到当日数据
+        """
+        if day in self.days:
+            return self.days[day]
+        day_data = self.cache.get(day)
+        cached = day_data is not None
+        day_data, hitokoto = self.fetch(day, day_data)
+        if day_data is None:
+            raise LookupError(f"没有 {day.isoformat()} 的数据")
+        if not cached:
+            self.cache.put(day, day_data)
+        self.days[day] = (day_data, hitokoto)
+        while len(self.days) > DAY_DATA_DAYS:
+            self.days.popitem(last=False)
+        return day_data, hitokoto
+
+
+class RenderCache:
+    """
+    有界 LRU + single-flight：相同 key 的并发请求共享一次渲染。
+
+    :param render: 阻塞的渲染函数，render(*key) -> bytes，在专用线程中执行
+    :param size: 最多缓存的条目数
+    :param executor: 执行渲染的线程池，默认新建单线程池；与其他渲染方共享时传入同一个
+    """
+
+    def __init__(self, render, size=RENDER_CACHE_SIZE, executor=None):
+        self.render = render
+        self.size = size
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.stats = {"hits": 0, "renders": 0, "joined": 0}
+        # 单线程串行渲染：字体对象不跨线程共享，也不与事件循环争抢 CPU
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="render"
+        )
+
+    async def get(self, key):
+        frame = self.entries.get(key)
+        if frame is not None:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return frame
+
+        future = self.inflight.get(key)
+        if future is not None:
+            # 已有相同的渲染在进行，等待它的结果
+            self.stats["joined"] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.inflight[key] = future
+        self.stats["renders"] += 1
+        try:
+            frame = await loop.run_in_executor(self.executor, self.render, *key)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 已由本调用方处理，避免无人等待时的警告
+            raise
+        finally:
+            del self.inflight[key]
+        future.set_result(frame)
+        self.entries[key] = frame
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return frame
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class PanelRenderer:
+    """
+    为每块屏按需渲染 2 位打包帧。
+
+    :param days: DaySource，默认读取 ./cache 并在缺失时联网
+    :param devices: {设备 ID: 配置}，见 load_devices
+    :param cache_size: LRU 容量
+    :param executor: 渲染线程池，见 RenderCache
+    """
+
+    def __init__(self, days=None, devices=None, cache_size=RENDER_CACHE_SIZE, executor=None):
+        self.days = days or DaySource()
+        self.devices = devices or {}
+        self.sizes = layouts_by_size()
+        self.layouts = set(self.sizes.values())
+        self.cache = RenderCache(self.render, cache_size, executor)
+
+    def handles(self, params):
+        """请求中带有设备 ID、分辨率或布局时按屏渲染。"""
+        return any(params.get(key) for key in PANEL_PARAMS)
+
+    def resolve(self, params):
+        """
+        请求参数 -> 配置 (布局名, palette, glyph_atlas)。
+        :raises ValueError: 未知的布局或不支持的分辨率
+        """
+        device = self.devices.get(params.get("device"), {})
+        layout = params.get("layout")
+        if not layout and params.get("size"):
+            width, _, height = params["size"].lower().partition("x")
+            layout = self.sizes.get((int(width), int(height)))
+            if layout is None:
+                raise ValueError(f"unsupported size: {params['size']}")
+        layout = layout or device.get("layout") or DEFAULT_LAYOUT
+        if layout not in self.layouts:
+            raise ValueError(f"unknown layout: {layout}")
+        return layout, bool(device.get("palette")), bool(device.get("glyph_atlas"))
+
+    def render(self, day, config):
+        """渲染并打包（在渲染线程中执行）。"""
+        day_data, hitokoto = self.days.get(day)
+        layout, palette, glyph_atlas = config
+        img = get_plan(layout, glyph_atlas, palette).render_day(day_data, hitokoto, day)
+        return pack_image(img)
+
+    async def frame(self, params, day=None):
+        """
+        :param params: server.parse_request 的结果
+        :return: 该屏当天的 2 位打包帧
+        """
+        config = self.resolve(params)
+        return await self.cache.get((day or datetime.date.today(), config))
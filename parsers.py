@@ -0,0 +1,74 @@
+"""
+基于 lxml 的页面解析，字段与 script.py 中 BeautifulSoup 版本一致。
+
+lxml 在 C 层构建文档树，XPath 表达式预先编译，只访问需要的节点，
+比 html.parser + BeautifulSoup 快一个数量级，内存占用也小得多。
+"""
+
+import lxml.html
+from lxml import etree
+
+
+def _has_class(name):
+    # 与 BeautifulSoup 的 class_ 匹配语义一致：class 属性中包含该词即可
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_LUNAR_TOP = etree.XPath(f"(//div[{_has_class('lunar-top')}])[1]")
+_YI_SECTIONS = etree.XPath(f"//div[{_has_class('yi')}]")
+_DAY_YI = etree.XPath(f"(.//div[{_has_class('day-yi')}])[1]")
+_LUNAR_MONTH = etree.XPath(f"(//h2[{_has_class('lunar-month')}])[1]")
+_LUNAR_DAY = etree.XPath(f"(//h2[{_has_class('lunar-day')}])[1]")
+_WNRL_DAYS = etree.XPath(f"//div[{_has_class('wnrl_k_you')}]")
+_WNRL_JIERI = etree.XPath(
+    f"(.//span[{_has_class('wnrl_k_you_id_wnrl_jieri_neirong')}])[1]"
+)
+
+
+def _first(nodes):
+    return nodes[0] if nodes else None
+
+
+def _section_items(section):
+    day_yi = _first(_DAY_YI(section))
+    return " ".join(span.text_content() for span in day_yi.iter("span"))
+
+
+def parse_huangli_html(html):
+    """
+    解析黄历网页面，字段同 script.parse_huangli_data。
+    :param html: 页面文本
+    :return: dict with parsed data
+    """
+    doc = lxml.html.fromstring(html)
+    lunar_top = _first(_LUNAR_TOP(doc))
+    lucky_info = list(lunar_top.iter("span"))
+    yi_sections = _YI_SECTIONS(doc)
+
+    return {
+        "solar_date": _first(lunar_top.xpath(".//h3")).text_content().strip(),
+        "lucky_zodiac": lucky_info[0].text_content().strip().replace("今日幸运生肖：", ""),
+        "lucky_constellation": lucky_info[1].text_content().strip().replace("今日星座：", ""),
+        "yi_list": _section_items(yi_sections[0]),
+        "ji_list": _section_items(yi_sections[1]),
+        "lunar_month": _first(_LUNAR_MONTH(doc)).text_content().strip(),
+        "lunar_day": _first(_LUNAR_DAY(doc)).text_content().strip(),
+    }
+
+
+def parse_wannianrili_html(html):
+    """
+    解析万年历页面，获取今日文本，同 script.parse_wannianrili_data。
+    :param html: 页面文本
+    :return: string with today's text if found, otherwise None
+    """
+    doc = lxml.html.fromstring(html)
+    for div in _WNRL_DAYS(doc):
+        if "display: block" in div.get("style", ""):
+            span = _first(_WNRL_JIERI(div))
+            if span is not None:
+                link = _first(span.xpath(".//a"))
+                if link is not None:
+                    return link.text_content()
+            return None
+    return None
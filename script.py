@@ -1,42 +1,112 @@
-import requests
-from bs4 import BeautifulSoup
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
+import argparse
 import datetime
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-os.chdir("/home/blame/workspace/calendar_generator")
+from daycache import DayCache
+from frameformat import ENCODINGS, FrameFormatError, encode_frame, unwrap_frame
+from framediff import dirty_rects, encode_delta
+from layout import DEFAULT_LAYOUT, get_plan, render_panels, wrap_text_cn
+from packer import iter_packed
+from timing import profile, stage, write_metrics
+
+# 字体、素材、缓存等相对路径都以脚本所在目录为准（作为程序运行时切换到该目录）
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # ------------------------ Configuration ------------------------
 URL_HUANGLI = "https://www.huangli.com/huangli/"
 URL_WANNIANRILI = "https://wannianrili.bmcx.com/"
-FONT_PATH_DEFAULT = "./font/hu.ttf"
-FONT_PATH_ART = "./font/maobi.ttf"
-ASSETS_WEEKEND = "./assets/weekend.bmp"
+URL_HITOKOTO = "https://v1.hitokoto.cn/?encode=text"
+# 指定日期的页面，用于预取未来若干天的数据
+URL_HUANGLI_DATE = "https://www.huangli.com/huangli/{day:%Y}/{day:%m%d}.html"
+URL_WANNIANRILI_DATE = "https://wannianrili.bmcx.com/{day:%Y-%m-%d}__wannianrili/"
 OUTPUT_IMAGE = "calendar_400x300.bmp"
 OUTPUT_BINARY = "compressed_image.bin"
 
-# 定义颜色映射表（2 位表示一个像素）
-COLOR_MAP = {
-    (255, 255, 255): 0b00,  # 白色
-    (0, 0, 0): 0b01,  # 黑色
-    (255, 0, 0): 0b10,  # 红色
+# 各数据源的请求超时（秒）
+FETCH_TIMEOUTS = {
+    "huangli": 10,
+    "wannianrili": 10,
+    "hitokoto": 5,
 }
 
-
 # ------------------ Data Fetching and Parsing ------------------
+def create_session():
+    """
+    创建带连接池的 requests.Session，供并发抓取复用。
+    """
+    # 网络相关的库只在真正抓取时导入，pack / header 等子命令不必为此付出启动时间
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_text(url, session=None, timeout=10):
+    """
+    抓取 URL 的文本内容。
+    :param url: URL to fetch content
+    :param session: 复用的 requests.Session，为 None 时直接使用 requests
+    :param timeout: 请求超时（秒）
+    :return: 文本内容，失败（超时、连接错误、非 200）时返回 None
+    """
+    import requests
+
+    try:
+        response = (session or requests).get(url, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"请求失败：{url}，{e}")
+        return None
+    response.encoding = "utf-8"
+    if response.status_code == 200:
+        return response.text
+    print(f"请求失败，状态码：{response.status_code}")
+    return None
+
+
 def fetch_html_content(url):
     """
     Fetch HTML content from a given URL.
     :param url: URL to fetch content
     :return: BeautifulSoup object if successful, None otherwise
     """
-    response = requests.get(url)
-    response.encoding = "utf-8"
-    if response.status_code == 200:
-        return BeautifulSoup(response.text, "html.parser")
-    else:
-        print(f"请求失败，状态码：{response.status_code}")
+    from bs4 import BeautifulSoup
+
+    text = fetch_text(url)
+    if text is None:
         return None
+    return BeautifulSoup(text, "html.parser")
+
+
+def fetch_sources(urls, session=None, timeouts=None):
+    """
+    并发抓取多个数据源，全部返回（或超时）后再交给解析和渲染。
+    单个数据源失败不影响其他数据源，其结果为 None，由调用方回退处理。
+
+    :param urls: {数据源名称: URL}
+    :param session: 复用的 requests.Session，为 None 时新建
+    :param timeouts: {数据源名称: 超时秒数}，缺省使用 FETCH_TIMEOUTS
+    :return: {数据源名称: 文本内容或 None}
+    """
+    timeouts = timeouts or FETCH_TIMEOUTS
+    own_session = session is None
+    if own_session:
+        session = create_session()
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(urls), 1)) as pool:
+            futures = {
+                name: pool.submit(fetch_text, url, session, timeouts.get(name, 10))
+                for name, url in urls.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+    finally:
+        if own_session:
+            session.close()
 
 
 def parse_huangli_data(soup):
@@ -103,77 +173,63 @@ def parse_wannianrili_data(soup):
     return today_text
 
 
-# ----------------------- Image Rendering -----------------------
-def wrap_text_cn(text, font, max_width):
+def day_urls(day=None):
     """
-    手动将中文文本按像素宽度换行，确保不超过最大宽度。
-
-    :param text: 待换行的文本
-    :param font: PIL ImageFont 对象，用于测量字体宽度
-    :param max_width: 最大允许的像素宽度
-    :return: 换行后的文本列表
+    :param day: datetime.date，为 None 时使用两个网站的“今日”页面
+    :return: {"huangli": URL, "wannianrili": URL}
     """
-    wrapped_lines = []
-    line = ""
-    for char in text:
-        line_width = font.getlength(line + char)
-        if line_width <= max_width and char != "\n":
-            line += char
-        else:
-            wrapped_lines.append(line.strip())
-            if char != "\n":
-                line = char
-            else:
-                line = ""
-    if line:
-        wrapped_lines.append(line.strip())
-    return wrapped_lines
+    if day is None:
+        return {"huangli": URL_HUANGLI, "wannianrili": URL_WANNIANRILI}
+    return {
+        "huangli": URL_HUANGLI_DATE.format(day=day),
+        "wannianrili": URL_WANNIANRILI_DATE.format(day=day),
+    }
 
 
-def load_fonts():
+def parse_day_pages(pages):
     """
-    加载所需字体，若失败则使用默认字体。
-    :return: dictionary of ImageFont objects
+    解析抓取到的黄历和万年历页面（lxml 解析，见 parsers.py），合并为一天的数据。
+    :param pages: fetch_sources 的返回值
+    :return: dict（黄历字段 + today_text），黄历页面缺失时返回 None
     """
-    fonts = {}
-    # 字体大小
-    font_super_height = 40
-    font_large_height = 20
-    font_medium_height = 16
-    font_small_height = 14
-    font_art_height = 20
+    from parsers import parse_huangli_html, parse_wannianrili_html
 
-    try:
-        font_large = ImageFont.truetype(FONT_PATH_DEFAULT, font_large_height)
-        font_medium = ImageFont.truetype(FONT_PATH_DEFAULT, font_medium_height)
-        font_small = ImageFont.truetype(FONT_PATH_DEFAULT, font_small_height)
-        font_super = ImageFont.truetype(FONT_PATH_DEFAULT, font_super_height)
-    except IOError:
-        print("字体文件未找到，使用默认字体")
-        font_super = ImageFont.load_default()
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
-        font_small = ImageFont.load_default()
+    if not pages.get("huangli"):
+        return None
+    day_data = parse_huangli_html(pages["huangli"])
 
-    try:
-        font_art = ImageFont.truetype(FONT_PATH_ART, font_art_height)
-    except IOError:
-        font_art = ImageFont.load_default()
+    # 万年历数据可选，失败时不显示
+    day_data["today_text"] = None
+    if pages.get("wannianrili"):
+        day_data["today_text"] = parse_wannianrili_html(pages["wannianrili"])
+    return day_data
 
-    fonts["font_super"] = font_super
-    fonts["font_large"] = font_large
-    fonts["font_medium"] = font_medium
-    fonts["font_small"] = font_small
-    fonts["font_art"] = font_art
-    fonts["font_super_height"] = font_super_height
-    fonts["font_large_height"] = font_large_height
-    fonts["font_medium_height"] = font_medium_height
-    fonts["font_small_height"] = font_small_height
-    fonts["font_art_height"] = font_art_height
 
-    return fonts
+def prefetch_days(start, days, cache, session=None):
+    """
+    预取 start 起 days 天的数据写入缓存，已缓存的日期跳过，并顺带清理已过期的缓存文件。
+    :param start: datetime.date
+    :param days: 天数
+    :param cache: DayCache
+    :return: 成功写入的日期列表
+    """
+    wanted = [start + datetime.timedelta(days=i) for i in range(days)]
+    fetched = []
+    for day in cache.missing(wanted):
+        day_data = parse_day_pages(fetch_sources(day_urls(day), session))
+        if day_data is None:
+            print(f"预取失败：{day.isoformat()}")
+            continue
+        cache.put(day, day_data)
+        fetched.append(day)
+        print(f"已预取：{day.isoformat()}")
+    removed = cache.prune()
+    if removed:
+        print(f"已清理 {removed} 个过期的缓存文件")
+    return fetched
 
 
+# ----------------------- Image Rendering -----------------------
 def create_calendar_image(
     solar_date,
     lucky_zodiac,
@@ -183,276 +239,159 @@ def create_calendar_image(
     lunar_month,
     lunar_day,
     today_text,
+    hitokoto=None,
+    day=None,
+    layout=DEFAULT_LAYOUT,
+    glyph_atlas=False,
+    palette=False,
 ):
     """
     创建并绘制日历图片，返回 PIL.Image 对象。
+    渲染过程不访问网络，hitokoto 为 None 时不绘制一言。
+    day 为所渲染的日期（datetime.date，用于判断周末），默认为今天。
+    layout 为面板布局名（见 layout.py 和 layouts/ 目录），默认 4.2 寸 400x300。
+    glyph_atlas 为 True 时用预先栅格化的字形图集绘制文字（见 glyphatlas.py）。
+    palette 为 True 时直接绘制为三色调色板（P 模式）图片，文字不做抗锯齿。
     """
-    # 定义画布大小
-    width, height = 400, 300
-    image = Image.new("RGB", (width, height), (255, 255, 255))
-    draw = ImageDraw.Draw(image)
-
-    # 加载字体
-    fonts = load_fonts()
-    font_super = fonts["font_super"]
-    font_large = fonts["font_large"]
-    font_medium = fonts["font_medium"]
-    font_small = fonts["font_small"]
-    font_art = fonts["font_art"]
-    font_small_height = fonts["font_small_height"]
-    font_art_height = fonts["font_art_height"]
-    line_spacing = 4
-
-    # 颜色定义
-    header_bg_color = (255, 0, 0)  # 顶部背景颜色
-    text_color = (0, 0, 0)  # 黑色
-    yi_color = (255, 255, 255)  # 宜（白色）
-    ji_color = (255, 255, 255)  # 忌（白色）
-    yi_bg_color = (255, 0, 0)  # 红色
-    ji_bg_color = (0, 0, 0)  # 黑色
-
-    # 绘制顶部背景矩形
-    draw.rectangle([0, 0, width, 50], fill=header_bg_color)
-
-    # 去除 "(阳历)" 并绘制
-    solar_date = solar_date.replace("(阳历)", "").strip()
-    solar_date_width = font_medium.getlength(solar_date)
-    draw.text(
-        ((width - solar_date_width) // 2, 5),
+    return get_plan(layout, glyph_atlas, palette).render(
         solar_date,
-        fill=(255, 255, 255),
-        font=font_medium,
-    )
-
-    # 绘制幸运生肖和星座
-    l_zodiac = "今日幸运生肖：" + lucky_zodiac
-    draw.text((30, 30), l_zodiac, fill=(255, 255, 255), font=font_small)
-    l_constellation = "今日星座：" + lucky_constellation
-    lucky_constellation_width = font_small.getlength(l_constellation)
-    draw.text(
-        (width - lucky_constellation_width - 30, 30),
-        l_constellation,
-        fill=(255, 255, 255),
-        font=font_small,
-    )
-
-    # 绘制农历月份和农历日期
-    font_super_height = font_super.size  # 取当前 super 字体大小
-    lunar_month_width = font_super.getlength(lunar_month)
-    lunar_day_width = font_super.getlength(lunar_day)
-
-    draw.text(
-        ((width - lunar_month_width) / 2, 75),
+        lucky_zodiac,
+        lucky_constellation,
+        yi_list,
+        ji_list,
         lunar_month,
-        fill=text_color,
-        font=font_super,
-    )
-    draw.text(
-        ((width - lunar_day_width) / 2, 75 + font_super_height),
         lunar_day,
-        fill=text_color,
-        font=font_super,
+        today_text,
+        hitokoto,
+        day,
     )
 
-    bottom_of_lunar = 75 + 2 * font_super_height
 
-    # 如果有 today_text 信息（如节日）
-    if today_text:
-        today_text_width = font_medium.getlength(today_text)
-        draw.text(
-            ((width - today_text_width) / 2, 75 + 2 * font_super_height + 10),
-            today_text,
-            fill=header_bg_color,
-            font=font_medium,
-        )
-        bottom_of_lunar += font_medium.size + 10
-
-    # 绘制“宜”圆形及其文本
-    circle_yi_x, circle_yi_y = 75, 90
-    draw.circle((circle_yi_x, circle_yi_y), font_large.size // 2 + 15, fill=yi_bg_color)
-    yi_width = font_large.getlength("宜")
-    draw.text(
-        (circle_yi_x - yi_width // 2, circle_yi_y - font_large.size // 2),
-        "宜",
-        fill=yi_color,
-        font=font_large,
-    )
-
-    # 分行绘制宜事项
-    wrapped_yi_list = wrap_text_cn(yi_list, font_small, 100)
-    start_y = circle_yi_y + font_large.size // 2 + 15 + 10
-    draw.text(
-        (circle_yi_x - 50, start_y),
-        "\n".join(wrapped_yi_list),
-        fill=text_color,
-        font=font_small,
-    )
-    height_yi = (
-        start_y
-        + font_small_height * len(wrapped_yi_list)
-        + line_spacing * (len(wrapped_yi_list) - 1)
-    )
-
-    # 绘制“忌”圆形及其文本
-    circle_ji_x = 325
-    circle_ji_y = circle_yi_y
-    draw.circle((circle_ji_x, circle_ji_y), font_large.size // 2 + 15, fill=ji_bg_color)
-    ji_width = font_large.getlength("忌")
-    draw.text(
-        (circle_ji_x - ji_width // 2, circle_ji_y - font_large.size // 2),
-        "忌",
-        fill=ji_color,
-        font=font_large,
-    )
+# -------------------- Image Compression ------------------------
+@contextmanager
+def atomic_output(path):
+    """
+    以二进制方式写临时文件，成功后 os.replace 覆盖目标，读取方（如 server.py）
+    只会看到旧文件或完整的新文件，不会读到写了一半的帧。
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
-    # 分行绘制忌事项
-    wrapped_ji_list = wrap_text_cn(ji_list, font_small, 100)
-    draw.text(
-        (circle_ji_x - 50, start_y),
-        "\n".join(wrapped_ji_list),
-        fill=text_color,
-        font=font_small,
-    )
-    height_ji = (
-        start_y
-        + font_small_height * len(wrapped_ji_list)
-        + line_spacing * (len(wrapped_ji_list) - 1)
-    )
-    last_height = max(height_yi, height_ji, bottom_of_lunar)
-
-    # 判断是否是周末
-    today = datetime.datetime.now()
-    box_y_start = last_height + font_small_height
-    if today.weekday() in [5, 6]:
-        # 周末
-        try:
-            img_weekend = Image.open(ASSETS_WEEKEND)
-            img_weekend = img_weekend.convert("1")
-            image.paste(img_weekend, (50, box_y_start + font_small_height // 2))
-            draw.text(
-                (
-                    50 + img_weekend.width + 40,
-                    box_y_start
-                    + font_small_height // 2
-                    + img_weekend.height // 2
-                    - font_art_height,
-                ),
-                "是谁在加班？\n温暖了寂寞！",
-                fill=text_color,
-                font=font_art,
-            )
-        except IOError:
-            print("周末提示图片不存在或无法打开。")
-    else:
-        # 非周末，去 hitokoto 接口
-        resp = requests.get("https://v1.hitokoto.cn/?encode=text")
-        if resp.status_code == 200:
-            hitokoto = resp.text.strip()
-            lines = wrap_text_cn(hitokoto, font_art, 320)
-            if len(lines) > 1:
-                y_position = ((height - 5) + box_y_start) // 2 - (
-                    # fontsize the spacing between lines: 4
-                    font_art_height * len(lines)
-                    + line_spacing * (len(lines) - 1)
-                ) // 2
-                draw.text(
-                    (40, y_position),
-                    "\n".join(lines),
-                    fill=text_color,
-                    font=font_art,
-                )
-            else:
-                text_width = font_art.getlength(lines[0])
-                draw.text(
-                    (
-                        (width - text_width) / 2,
-                        ((height - 5) + box_y_start) // 2 - font_art_height // 2,
-                    ),
-                    lines[0],
-                    fill=text_color,
-                    font=font_art,
-                )
-    # draw a double rectangle box
-    draw.rounded_rectangle(
-        [5, box_y_start, width - 5, height - 5],
-        radius=10,
-        outline=(255, 0, 0),
-        width=3,
-    )
-    draw.rounded_rectangle(
-        [10, box_y_start + 5, width - 10, height - 10],
-        radius=10,
-        outline=(255, 0, 0),
-    )
 
-    draw.rectangle([0, 0, width, height], outline=(255, 0, 0), width=3)
+def write_file_atomic(path, data):
+    """原子地写入整个 bytes，见 atomic_output。"""
+    with atomic_output(path) as f:
+        f.write(data)
 
-    return image
 
+def image_to_compressed_binary(img, output_path=None, threshold=128, encoding=None, dither=None):
+    """
+    直接压缩内存中的图片（如 create_calendar_image 的返回值），无需先保存为 BMP。
 
-# -------------------- Image Compression ------------------------
-def bmp_to_compressed_binary(image_path, output_path, threshold=128):
+    :param img: PIL.Image 对象
+    :param output_path: 输出的二进制文件路径，为 None 时不写文件
+    :param threshold: 二值化灰度阈值（默认 128）
+    :param encoding: None 输出无帧头的 2 位打包数据（兼容现有墨水屏）；
+                     "raw" / "rle" 输出带版本头的帧（见 frameformat.py）
+    :param dither: None 按灰度阈值二值化；"nearest" / "ordered" / "floyd-steinberg"
+                   映射到最近的三色调色板颜色并抖动，保留照片和插画中的红色（见 packer.quantize）
+    :return: 压缩后的 bytes
+    """
+    # 逐条带打包（见 packer.iter_packed），不生成整帧的中间数组，大尺寸面板的峰值内存
+    # 从几十 MB 降到 1 MB 以内；无帧头时每个条带打包完即写入文件
+    chunks = iter_packed(img, threshold, dither=dither)
+    if output_path and not encoding:
+        compressed_data = bytearray()
+        with atomic_output(output_path) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                compressed_data += chunk
+        print(f"压缩数据已保存到：{output_path}")
+        return bytes(compressed_data)
+
+    # 带帧头的格式需要整帧的长度和 RLE 编码，先拼接再写入
+    compressed_data = b"".join(chunks)
+    if encoding:
+        compressed_data = encode_frame(compressed_data, *img.size, encoding)
+
+    if output_path:
+        write_file_atomic(output_path, compressed_data)
+        print(f"压缩数据已保存到：{output_path}")
+
+    return compressed_data
+
+
+def bmp_to_compressed_binary(image_path, output_path, threshold=128, encoding=None, dither=None):
     """
     压缩 BMP 图片为二进制文件，并对非标准颜色进行二值化。
 
     :param image_path: 输入 BMP 图片路径
     :param output_path: 输出的二进制文件路径
     :param threshold: 二值化灰度阈值（默认 128）
+    :param encoding: 帧编码，同 image_to_compressed_binary
+    :param dither: 抖动方式，同 image_to_compressed_binary
+    :return: 压缩后的 bytes
     """
-    img = Image.open(image_path).convert("RGB")
-    width, height = img.size
-    pixels = img.load()
-
-    # 将非标准颜色做二值化处理
-    for y in range(height):
-        for x in range(width):
-            color = pixels[x, y]
-            if color not in COLOR_MAP:
-                gray = int(0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2])
-                pixels[x, y] = (255, 255, 255) if gray >= threshold else (0, 0, 0)
-
-    # 开始压缩像素数据
-    compressed_data = []
-    current_byte = 0
-    bit_position = 0
-
-    for y in range(height):
-        for x in range(width):
-            color_bits = COLOR_MAP[pixels[x, y]]
-            # 将颜色编码移到正确的位置，每个像素占 2 位
-            current_byte |= color_bits << (6 - bit_position)
-            bit_position += 2
-
-            if bit_position == 8:
-                compressed_data.append(current_byte)
-                current_byte = 0
-                bit_position = 0
-
-    # 如果最后一个字节没有填满，补 0
-    if bit_position > 0:
-        compressed_data.append(current_byte)
-
-    # 保存到二进制文件
-    with open(output_path, "wb") as f:
-        f.write(bytes(compressed_data))
-
-    print(f"压缩数据已保存到：{output_path}")
+    with Image.open(image_path) as img:
+        return image_to_compressed_binary(img, output_path, threshold, encoding, dither)
 
 
 # ------------------------ Main Logic ---------------------------
-def main():
-    # 抓取并解析黄历数据
-    soup_huangli = fetch_html_content(URL_HUANGLI)
-    if not soup_huangli:
-        return
-    huangli_data = parse_huangli_data(soup_huangli)
-
-    # 抓取并解析万年历数据
-    soup_wannianrili = fetch_html_content(URL_WANNIANRILI)
-    if soup_wannianrili:
-        today_text = parse_wannianrili_data(soup_wannianrili)
-    else:
-        today_text = None
+def main(
+    image_path=OUTPUT_IMAGE,
+    binary_path=OUTPUT_BINARY,
+    use_cache=True,
+    encoding=None,
+    delta_path=None,
+    layouts=None,
+    glyph_atlas=False,
+    palette=False,
+    session=None,
+):
+    """
+    抓取数据、渲染日历并压缩。
+
+    :param image_path: BMP 预览图输出路径，为 None 时不保存
+    :param binary_path: 压缩数据输出路径，为 None 时不保存
+    :param use_cache: 是否读写按日期缓存的解析数据
+    :param encoding: 帧编码，同 image_to_compressed_binary
+    :param delta_path: 相对上一次 binary_path 输出的差分帧路径，为 None 时不生成
+    :param layouts: 面板布局名列表（见 layout.py），默认只渲染 4.2 寸；
+                    多个面板时各输出路径加上布局名后缀，如 compressed_image-7.5in.bin
+    :param glyph_atlas: 是否用字形图集绘制文字（见 glyphatlas.py）
+    :param palette: 是否直接渲染为三色调色板图片，省去打包时的颜色匹配和二值化
+    :param session: 复用的 requests.Session（常驻进程保持连接），为 None 时每次新建
+    :return: 压缩后的 bytes（多个面板时为第一个面板的），抓取失败时返回 None
+    """
+    today = datetime.date.today()
+    cache = DayCache() if use_cache else None
+    day_data = cache.get(today) if cache else None
+    if day_data is not None:
+        print(f"使用缓存数据：{cache.path(today)}")
+
+    # 并发抓取缺失的当日数据和一言（周末不显示一言，无需请求）。
+    # 请求指定日期的页面而不是网站的“今日”页面：零点刚过时“今日”页面可能还是昨天的，
+    # 而结果会按 today 写入缓存，当天之内不再过期
+    urls = {} if day_data is not None else day_urls(today)
+    if today.weekday() not in [5, 6]:
+        urls["hitokoto"] = URL_HITOKOTO
+    with stage("fetch"):
+        pages = fetch_sources(urls, session)
+
+    if day_data is None:
+        # 黄历数据必需，抓取失败则放弃本次渲染
+        with stage("parse"):
+            day_data = parse_day_pages(pages)
+        if day_data is None:
+            return
+        if cache:
+            cache.put(today, day_data)
+    huangli_data = day_data
+    today_text = day_data["today_text"]
 
     # 打印日志（与原逻辑保持一致）
     print(f"公历日期：{huangli_data['solar_date']}")
@@ -464,23 +403,154 @@ def main():
     print(f"农历日期：{huangli_data['lunar_day']}")
     print(f"今日：{today_text}")
 
-    # 创建图片
-    img = create_calendar_image(
-        huangli_data["solar_date"],
-        huangli_data["lucky_zodiac"],
-        huangli_data["lucky_constellation"],
-        huangli_data["yi_list"],
-        huangli_data["ji_list"],
-        huangli_data["lunar_month"],
-        huangli_data["lunar_day"],
-        today_text,
-    )
+    # 编译布局（加载字体、绘制静态底图），进程内只做一次，单独计时以便和渲染本身区分
+    layouts = layouts or [DEFAULT_LAYOUT]
+    with stage("compile_layout"):
+        for name in layouts:
+            get_plan(name, glyph_atlas, palette)
+
+    # 同一份数据渲染所有面板尺寸
+    with stage("render"):
+        images = render_panels(
+            layouts, huangli_data, pages.get("hitokoto"), today, glyph_atlas, palette
+        )
+
+    outputs = {}
+    for name, img in images.items():
+        suffix = name if len(images) > 1 else None
+        outputs[name] = write_outputs(
+            img,
+            panel_path(image_path, suffix),
+            panel_path(binary_path, suffix),
+            encoding,
+            panel_path(delta_path, suffix),
+        )
+    return outputs[layouts[0]]
+
+
+def panel_path(path, suffix):
+    """为多面板输出在文件名后加上布局名：frame.bin -> frame-7.5in.bin。"""
+    if not path or not suffix:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{suffix}{ext}"
 
-    # 保存并压缩
-    img.save(OUTPUT_IMAGE)
-    print(f"图片已生成：{OUTPUT_IMAGE}")
-    bmp_to_compressed_binary(OUTPUT_IMAGE, OUTPUT_BINARY)
+
+def write_outputs(img, image_path, binary_path, encoding=None, delta_path=None):
+    """
+    保存一个面板的 BMP 预览图、压缩数据和差分帧（路径为 None 的跳过）。
+    :return: 压缩后的 bytes
+    """
+    # 直接压缩内存中的图片，BMP 预览图仅作为可选输出
+    if image_path:
+        with stage("save_bmp"):
+            img.save(image_path)
+        print(f"图片已生成：{image_path}")
+    previous = read_previous_frame(binary_path) if delta_path else None
+    with stage("compress"):
+        data = image_to_compressed_binary(img, binary_path, encoding=encoding)
+    if delta_path and previous is not None:
+        with stage("delta"):
+            write_delta(previous, unwrap_frame(data), img.size, delta_path)
+    return data
+
+
+def read_previous_frame(binary_path):
+    """
+    读取上一次输出的帧（2 位打包数据），不存在或无法解析时返回 None。
+    """
+    try:
+        with open(binary_path, "rb") as f:
+            return unwrap_frame(f.read())
+    except (OSError, FrameFormatError):
+        return None
+
+
+def write_delta(previous, packed, size, delta_path):
+    """
+    计算并保存相对上一帧的差分（见 framediff.py），打印脏矩形概况。
+    """
+    width, height = size
+    try:
+        delta = encode_delta(previous, packed, width, height)
+    except FrameFormatError as e:
+        print(f"无法生成差分帧：{e}")
+        return None
+    rects = dirty_rects(previous, packed, width, height)
+    changed = sum(h * w for _, h, _, w in rects)
+    print(
+        f"差分帧已保存到：{delta_path}（{len(rects)} 个矩形，"
+        f"{changed}/{len(packed)} 字节变化，共 {len(delta)} 字节）"
+    )
+    write_file_atomic(delta_path, delta)
+    return delta
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="生成墨水屏日历图片")
+    parser.add_argument("--bmp", default=OUTPUT_IMAGE, help="BMP 预览图输出路径")
+    parser.add_argument("--bin", default=OUTPUT_BINARY, help="压缩数据输出路径")
+    parser.add_argument("--no-bmp", action="store_true", help="不保存 BMP 预览图")
+    parser.add_argument("--no-bin", action="store_true", help="不保存压缩数据")
+    parser.add_argument("--no-cache", action="store_true", help="不使用按日期缓存的数据")
+    parser.add_argument(
+        "--encoding",
+        choices=sorted(ENCODINGS),
+        help="输出带版本头的帧（raw 或 rle）；默认输出无帧头的原始数据",
+    )
+    parser.add_argument("--delta", metavar="PATH", help="同时输出相对上一帧的差分帧")
+    parser.add_argument(
+        "--prefetch", type=int, metavar="DAYS", help="预取今天起若干天的数据到缓存后退出"
+    )
+    parser.add_argument(
+        "--layout",
+        action="append",
+        metavar="NAME",
+        help="面板布局（layouts/ 下的文件名，如 2.9in、4.2in、7.5in），可重复指定",
+    )
+    parser.add_argument(
+        "--glyph-atlas", action="store_true", help="用预先栅格化的 1 位字形图集绘制文字"
+    )
+    parser.add_argument(
+        "--palette",
+        action="store_true",
+        help="直接渲染为三色调色板图片（无抗锯齿），打包时不再逐像素匹配颜色",
+    )
+    parser.add_argument(
+        "--metrics", metavar="PATH", help="输出各阶段耗时（\"-\" 为标准错误输出）"
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prom"],
+        default="json",
+        help="json 追加一行 JSON；prom 写 Prometheus 文本格式",
+    )
+    parser.add_argument("--profile", metavar="PATH", help="用 cProfile 记录本次运行并导出")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    """命令行入口（python script.py 或 python cli.py render）。"""
+    os.chdir(BASE_DIR)
+    args = parse_args(argv)
+    with profile(args.profile):
+        if args.prefetch:
+            with stage("prefetch"):
+                prefetch_days(datetime.date.today(), args.prefetch, DayCache())
+        else:
+            main(
+                image_path=None if args.no_bmp else args.bmp,
+                binary_path=None if args.no_bin else args.bin,
+                use_cache=not args.no_cache,
+                encoding=args.encoding,
+                delta_path=args.delta,
+                layouts=args.layout,
+                glyph_atlas=args.glyph_atlas,
+                palette=args.palette,
+            )
+    if args.metrics:
+        write_metrics(args.metrics, args.metrics_format)
 
 
 if __name__ == "__main__":
-    main()
+    run()
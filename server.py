@@ -1,55 +1,455 @@
-import socket
+import argparse
+import asyncio
 import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
 
 # 配置
 HOST = "0.0.0.0"  # 监听所有网络接口
 PORT = 8122  # 监听的TCP端口
-FILE_NAME = (
-    "/home/blame/workspace/calendar_generator/compressed_image.bin"  # 要传输的文件名
-)
+# 要传输的文件名（script.py 在其所在目录下的默认输出）
+FILE_NAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "compressed_image.bin")
+BACKLOG = 1024  # 等待队列长度，容纳同一时刻唤醒的大量墨水屏
+POLL_INTERVAL = 1.0  # 检查帧文件是否更新的间隔（秒）
+PROTOCOL_PORT = 8123  # 请求/应答协议端口（支持差分帧），PORT 保持原有的直接推送行为
+FRAME_SIZE = (400, 300)  # 帧的宽高（像素），用于计算差分
+HISTORY_SIZE = 8  # 服务器保留的历史帧个数
+REQUEST_TIMEOUT = 5.0  # 等待客户端请求行的超时（秒）
 
+# 协议端口的应答头：magic、协议版本、类型、帧版本、负载长度（小端序）
+RESPONSE = struct.Struct("<4sBBII")
+RESPONSE_MAGIC = b"CFRS"
+PROTOCOL_VERSION = 1
+KIND_FULL = 0  # 负载为完整的 2 位打包帧
+KIND_DELTA = 1  # 负载为差分帧（见 framediff.py）
+KIND_NOT_MODIFIED = 2  # 墨水屏已持有当前版本，无负载（仅分帧协议）
+KIND_NAMES = {KIND_FULL: "full", KIND_DELTA: "delta", KIND_NOT_MODIFIED: "not-modified"}
 
-def start_server():
-    # 检查文件是否存在
-    if not os.path.exists(FILE_NAME):
-        print(f"Error: {FILE_NAME} does not exist in the current directory.")
-        return
+# 分帧协议（请求中带 v=2，见 FrameServer.handle_request）的应答头，小端序：
+#   magic、协议版本、类型、帧版本、完整负载长度、本次偏移、本次长度、
+#   完整负载的 CRC32（同时作为续传用的 ETag）、本次负载的 CRC32
+RESPONSE_V2 = struct.Struct("<4sBBIIIIII")
+FRAMED_PROTOCOL_VERSION = 2
 
-    # 创建 TCP 套接字
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.bind((HOST, PORT))
-    server_socket.listen(1)  # 最大等待连接数为 1
-    print(f"Server is listening on {HOST}:{PORT}...")
 
-    try:
+def load_frame(file_name):
+    """
+    读取压缩帧到内存。
+    :param file_name: 压缩数据文件路径
+    :return: bytes
+    """
+    with open(file_name, "rb") as f:
+        return f.read()
+
+
+def _file_signature(file_name):
+    st = os.stat(file_name)
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class FrameHistory:
+    """
+    最近若干帧的有界历史，每帧分配一个递增的版本号，用于给墨水屏计算差分。
+
+    latest 是 (版本, 帧) 元组，整体替换，读取方总能拿到一致的一对值。
+    版本号从启动时的 Unix 时间开始计数，服务重启后不会与墨水屏手里的旧版本号重复。
+    """
+
+    def __init__(self, size=HISTORY_SIZE, frame_size=FRAME_SIZE):
+        self.size = size
+        self.frame_size = frame_size
+        self.frames = OrderedDict()
+        self.latest = (int(time.time()), b"")
+        self._deltas = {}
+
+    def add(self, frame):
+        """
+        加入新帧并淘汰最旧的帧。
+        :return: 新帧的版本号
+        """
+        version = self.latest[0] + 1
+        self.frames[version] = frame
+        while len(self.frames) > self.size:
+            self.frames.popitem(last=False)
+        self.latest = (version, frame)
+        self._deltas = {}
+        return version
+
+    def delta(self, base_version):
+        """
+        从 base_version 到最新帧的差分，按基准版本缓存。
+        带帧头的帧（--encoding raw / rle）先解出 2 位打包数据再比较，
+        差分总是针对解码后的像素数据（与 script.py --delta 相同）。
+        :return: 差分 bytes；基准帧已淘汰或无法差分时返回 None
+        """
+        # numpy 只在第一次计算差分时导入，直接推送端口的启动不受影响
+        from frameformat import FrameFormatError, unwrap_frame
+        from framediff import encode_delta
+
+        version, frame = self.latest
+        key = (base_version, version)
+        if key in self._deltas:
+            return self._deltas[key]
+        base = self.frames.get(base_version)
+        if base is None:
+            return None
+        try:
+            delta = encode_delta(
+                unwrap_frame(base), unwrap_frame(frame), *self.frame_size, base_version, version
+            )
+        except FrameFormatError as e:
+            # 结果按版本缓存，同一对版本只提示一次
+            print(
+                f"Cannot compute delta from v{base_version} to v{version}, "
+                f"sending full frame: {e}"
+            )
+            delta = None
+        self._deltas[key] = delta
+        return delta
+
+
+class FrameCache:
+    """
+    常驻内存的当前帧，轮询文件 mtime 检测 script.py 的新输出并原子替换。
+
+    current 始终指向一个完整的、不可变的 bytes 对象；替换只是一次引用赋值，
+    已开始发送的连接继续使用旧对象，新连接拿到新对象，不会出现半帧。
+    每个新帧同时记入 history，供协议端口计算差分。
+
+    :param frame: 可选，生成方手里已有的首帧（与 file_name 的内容相同），提供时不再读文件
+    """
+
+    def __init__(self, file_name, history=None, frame=None):
+        self.file_name = file_name
+        self.history = history or FrameHistory()
+        self.signature = _file_signature(file_name)
+        self.history.add(load_frame(file_name) if frame is None else frame)
+
+    @property
+    def current(self):
+        return self.history.latest[1]
+
+    def reload_if_changed(self):
+        """
+        若文件已更新则重新读取并替换当前帧。
+        :return: True 表示发生了替换
+        """
+        try:
+            signature = _file_signature(self.file_name)
+            if signature == self.signature:
+                return False
+            frame = load_frame(self.file_name)
+            # 读取期间文件又被改写（非原子写入的生成方），留待下次轮询
+            if _file_signature(self.file_name) != signature or len(frame) != signature[1]:
+                return False
+        except OSError as e:
+            print(f"Error while reloading {self.file_name}: {e}")
+            return False
+        self.signature = signature
+        self.history.add(frame)
+        print(f"Frame reloaded from {self.file_name} ({len(frame)} bytes)")
+        return True
+
+    def publish(self, frame):
+        """
+        同进程的生成方（daemon.py）直接换入新帧，无需等待轮询。
+        生成方应已把同一帧写入 file_name，这里记下文件签名，轮询时不会重复加载。
+        :return: 新帧的版本号
+        """
+        try:
+            self.signature = _file_signature(self.file_name)
+        except OSError:
+            pass
+        return self.history.add(frame)
+
+    async def watch(self, interval=POLL_INTERVAL):
+        """后台轮询任务。"""
         while True:
-            # 等待客户端连接
-            client_socket, client_address = server_socket.accept()
-            print(f"Connection established with {client_address}")
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.reload_if_changed)
+
+
+class FrameServer:
+    """
+    基于 asyncio 的多客户端帧服务器。
+
+    当前帧常驻内存，每个连接直接发送同一个 bytes 对象的 memoryview，
+    不再为每个客户端重新打开文件或分块复制数据。
 
+    :param cache: FrameCache，提供当前帧
+    :param panels: 可选，panels.PanelRenderer；提供时协议端口支持按屏渲染的请求
+    """
+
+    def __init__(self, cache, panels=None):
+        self.cache = cache
+        self.panels = panels
+
+    async def handle_client(self, reader, writer):
+        client_address = writer.get_extra_info("peername")
+        print(f"Connection established with {client_address}")
+        # 连接开始时取一次引用，之后即使发生热替换也发送同一帧
+        frame = self.cache.current
+        try:
+            writer.write(memoryview(frame))
+            await writer.drain()
+            print(f"Frame sent successfully to {client_address}")
+        except (ConnectionError, OSError) as e:
+            print(f"Error while sending frame to {client_address}: {e}")
+        finally:
+            writer.close()
             try:
-                # 发送文件内容
-                with open(FILE_NAME, "rb") as file:
-                    while True:
-                        data = file.read(1024)  # 每次读取 1024 字节
-                        if not data:
-                            break
-                        client_socket.sendall(data)  # 发送数据
-                print(f"File {FILE_NAME} sent successfully to {client_address}")
-
-            except Exception as e:
-                print(f"Error while sending file: {e}")
-
-            finally:
-                client_socket.close()
-                print(f"Connection with {client_address} closed.")
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def handle_request(self, reader, writer):
+        """
+        协议端口：客户端先发送一行请求，例如
+
+            FRAME have=12\n
+
+        have 为墨水屏当前持有的帧版本（没有则省略或为 0）。若该版本仍在历史中，
+        应答差分帧，否则应答完整帧。应答为 RESPONSE 头 + 负载。
+
+        启用按屏渲染时，墨水屏还可以报告设备 ID 和分辨率（见 panels.py）：
+
+            FRAME device=kitchen size=800x480\n
+
+        服务器为该屏按需渲染当天的完整帧，帧版本为帧内容的 CRC32。
 
+        请求中带 v=2 时使用分帧协议（应答头为 RESPONSE_V2，参考客户端见 client.py）：
+
+            FRAME v=2 have=12 offset=20480 if-range=1a2b3c4d length=4096\n
+
+        - have 等于当前版本时应答 KIND_NOT_MODIFIED，不带负载；
+        - offset + if-range 用于断点续传：if-range 为上次应答中完整负载的 CRC32（8 位十六进制），
+          与当前负载一致时从 offset 处继续发送，否则从头发送（应答中的偏移为 0）；
+        - length 限制单次发送的字节数，便于缓冲区很小的单片机分段下载、逐段校验。
+        """
+        client_address = writer.get_extra_info("peername")
+        try:
+            line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            params = parse_request(line)
+            if params.get("v") == str(FRAMED_PROTOCOL_VERSION):
+                header, kind, version, payload = await self.build_framed_response(params)
+            else:
+                kind, version, payload = await self.build_body(params)
+                header = RESPONSE.pack(
+                    RESPONSE_MAGIC, PROTOCOL_VERSION, kind, version, len(payload)
+                )
+            writer.write(header)
+            writer.write(memoryview(payload))
+            await writer.drain()
+            print(
+                f"Sent {KIND_NAMES[kind]} frame v{version} "
+                f"({len(payload)} bytes) to {client_address}"
+            )
+        except (asyncio.TimeoutError, ValueError) as e:
+            print(f"Bad request from {client_address}: {e!r}")
+        except LookupError as e:
+            print(f"No frame for {client_address}: {e}")
+        except (ConnectionError, OSError) as e:
+            print(f"Error while sending frame to {client_address}: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def build_body(self, params):
+        """
+        按请求选择全局帧（含差分）或按屏渲染的帧。
+        :return: (类型, 帧版本, 负载)
+        """
+        if self.panels is not None and self.panels.handles(params):
+            return await self.build_panel_response(params)
+        return self.build_response(params)
+
+    async def build_framed_response(self, params):
+        """
+        分帧协议的应答。
+        :return: (应答头, 类型, 帧版本, 本次负载)
+        """
+        have = int(params.get("have") or 0)
+        is_panel = self.panels is not None and self.panels.handles(params)
+        # 全局帧的版本无需生成负载即可比较，省去一次差分计算
+        if have and not is_panel and have == self.cache.history.latest[0]:
+            return _not_modified(have)
+        kind, version, body = await self.build_body(params)
+        if have and have == version:
+            return _not_modified(version)
+
+        etag = zlib.crc32(body)
+        offset = 0
+        if params.get("offset") and params.get("if-range") == f"{etag:08x}":
+            offset = int(params["offset"])
+            if not 0 <= offset <= len(body):
+                raise ValueError(f"offset out of range: {offset}")
+        length = int(params.get("length") or 0)
+        if length < 0:
+            raise ValueError(f"length out of range: {length}")
+        length = length or len(body)
+        payload = memoryview(body)[offset : offset + length]
+        header = RESPONSE_V2.pack(
+            RESPONSE_MAGIC,
+            FRAMED_PROTOCOL_VERSION,
+            kind,
+            version,
+            len(body),
+            offset,
+            len(payload),
+            etag,
+            zlib.crc32(payload),
+        )
+        return header, kind, version, payload
+
+    def build_response(self, params):
+        """
+        :param params: parse_request 的结果
+        :return: (类型, 帧版本, 负载)
+        """
+        history = self.cache.history
+        version, frame = history.latest
+        have = int(params.get("have") or 0)
+        if have:
+            delta = history.delta(have)
+            if delta is not None:
+                return KIND_DELTA, version, delta
+        return KIND_FULL, version, frame
+
+    async def build_panel_response(self, params):
+        """
+        按屏渲染的应答。不同配置的帧之间没有共同的历史，因此总是应答完整帧。
+        :return: (类型, 帧版本, 负载)
+        """
+        frame = await self.panels.frame(params)
+        return KIND_FULL, zlib.crc32(frame), frame
+
+    async def start(self, host=HOST, port=PORT):
+        """启动直接推送端口的监听，返回 asyncio.Server。"""
+        return await asyncio.start_server(
+            self.handle_client, host, port, backlog=BACKLOG
+        )
+
+    async def start_protocol(self, host=HOST, port=PROTOCOL_PORT):
+        """启动请求/应答协议端口的监听，返回 asyncio.Server。"""
+        return await asyncio.start_server(
+            self.handle_request, host, port, backlog=BACKLOG
+        )
+
+
+def _not_modified(version):
+    header = RESPONSE_V2.pack(
+        RESPONSE_MAGIC, FRAMED_PROTOCOL_VERSION, KIND_NOT_MODIFIED, version, 0, 0, 0, 0, 0
+    )
+    return header, KIND_NOT_MODIFIED, version, b""
+
+
+def parse_request(line):
+    """
+    解析请求行 "FRAME key=value ..."。
+    :param line: bytes
+    :return: {key: value}
+    """
+    words = line.decode("ascii").split()
+    if not words or words[0] != "FRAME":
+        raise ValueError(f"unknown request: {line[:64]!r}")
+    params = {}
+    for word in words[1:]:
+        key, _, value = word.partition("=")
+        params[key] = value
+    return params
+
+
+async def serve(
+    file_name=FILE_NAME,
+    host=HOST,
+    port=PORT,
+    poll_interval=POLL_INTERVAL,
+    protocol_port=PROTOCOL_PORT,
+    frame_size=FRAME_SIZE,
+    panels=None,
+):
+    cache = FrameCache(file_name, FrameHistory(frame_size=frame_size))
+    frame_server = FrameServer(cache, panels)
+    server = await frame_server.start(host, port)
+    protocol_server = await frame_server.start_protocol(host, protocol_port)
+    watcher = asyncio.create_task(cache.watch(poll_interval))
+    print(f"Server is listening on {host}:{port} (push) and {host}:{protocol_port} (protocol)...")
+    try:
+        async with server, protocol_server:
+            await asyncio.gather(server.serve_forever(), protocol_server.serve_forever())
+    finally:
+        watcher.cancel()
+
+
+def start_server(file_name=FILE_NAME, host=HOST, port=PORT, **kwargs):
+    # 检查文件是否存在
+    if not os.path.exists(file_name):
+        print(f"Error: {file_name} does not exist in the current directory.")
+        return
+
+    try:
+        asyncio.run(serve(file_name, host, port, **kwargs))
     except KeyboardInterrupt:
         print("\nServer shutting down...")
 
-    finally:
-        server_socket.close()
+
+def parse_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="墨水屏帧服务器")
+    parser.add_argument("--file", default=FILE_NAME, help="压缩数据文件路径")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument(
+        "--poll-interval", type=float, default=POLL_INTERVAL, help="帧文件更新检查间隔（秒）"
+    )
+    parser.add_argument(
+        "--protocol-port", type=int, default=PROTOCOL_PORT, help="请求/应答协议端口"
+    )
+    parser.add_argument(
+        "--size", type=parse_size, default=FRAME_SIZE, help="帧宽高，例如 400x300"
+    )
+    parser.add_argument(
+        "--panels", action="store_true", help="在协议端口上按设备 ID / 分辨率按需渲染"
+    )
+    parser.add_argument("--devices", default="devices.json", help="设备配置文件（JSON）")
+    parser.add_argument(
+        "--render-cache", type=int, default=64, help="按屏渲染结果的 LRU 容量"
+    )
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    """命令行入口（python server.py 或 python cli.py serve）。"""
+    args = parse_args(argv)
+    panels = None
+    if args.panels:
+        # 渲染相关的依赖（Pillow、字体、布局）只在启用按屏渲染时加载
+        from panels import PanelRenderer, load_devices
+
+        # 布局中的字体、素材路径相对于仓库目录
+        args.file = os.path.abspath(args.file)
+        devices = load_devices(args.devices)
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        panels = PanelRenderer(devices=devices, cache_size=args.render_cache)
+    start_server(
+        args.file,
+        args.host,
+        args.port,
+        poll_interval=args.poll_interval,
+        protocol_port=args.protocol_port,
+        frame_size=args.size,
+        panels=panels,
+    )
 
 
 if __name__ == "__main__":
-    start_server()
+    run()
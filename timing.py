@@ -0,0 +1,140 @@
+"""
+渲染流水线的分阶段计时。
+
+用 stage() 上下文管理器或 timed() 装饰器包住各阶段（抓取、解析、编译布局、
+渲染、保存、压缩……），一次运行结束后把耗时输出为 JSON Lines 或
+Prometheus 文本格式，便于在每次部署后追踪渲染延迟的回归：
+
+    with stage("fetch"):
+        pages = fetch_sources(urls)
+    write_metrics("metrics.jsonl")
+
+profile() 可选地用 cProfile 记录整个运行过程并导出 .prof 文件，
+用 python -m pstats 或 snakeviz 查看。
+"""
+
+import cProfile
+import json
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+METRIC_NAME = "calendar_stage_seconds"
+
+
+class StageTimer:
+    """记录一次运行中各阶段的耗时（同名阶段多次出现时累加）。"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages = {}
+
+    def reset(self):
+        self.started_at = time.time()
+        self.stages.clear()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        """装饰器版本的 stage，阶段名默认为函数名。"""
+
+        def decorator(func):
+            label = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(label):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self):
+        return sum(self.stages.values())
+
+    def to_json(self, **labels):
+        """
+        一次运行对应一行 JSON。
+        :param labels: 附加字段（如部署版本、主机名）
+        :return: str（不含换行）
+        """
+        record = {
+            "timestamp": round(self.started_at, 3),
+            **labels,
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "total": round(self.total(), 6),
+        }
+        return json.dumps(record, ensure_ascii=False)
+
+    def to_prometheus(self, **labels):
+        """
+        Prometheus 文本格式（可交给 node_exporter 的 textfile collector）。
+        :return: str
+        """
+        extra = "".join(f',{key}="{value}"' for key, value in sorted(labels.items()))
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of each calendar render stage.",
+            f"# TYPE {METRIC_NAME} gauge",
+        ]
+        for name, seconds in self.stages.items():
+            lines.append(f'{METRIC_NAME}{{stage="{name}"{extra}}} {seconds:.6f}')
+        lines.append(f'{METRIC_NAME}{{stage="total"{extra}}} {self.total():.6f}')
+        return "\n".join(lines) + "\n"
+
+
+# 进程内默认计时器，script.py 的各阶段都记录到这里
+TIMER = StageTimer()
+stage = TIMER.stage
+timed = TIMER.timed
+
+
+def write_metrics(path, fmt="json", timer=None, **labels):
+    """
+    输出计时结果。
+    :param path: 输出路径，"-" 表示标准错误输出
+    :param fmt: "json" 追加一行 JSON（历史记录）；"prom" 覆盖写 Prometheus 文本
+    :param timer: StageTimer，默认为 TIMER
+    :param labels: 附加标签
+    """
+    timer = timer or TIMER
+    if fmt == "prom":
+        text = timer.to_prometheus(**labels)
+        mode = "w"
+    else:
+        text = timer.to_json(**labels) + "\n"
+        mode = "a"
+    if path == "-":
+        sys.stderr.write(text)
+        return
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(text)
+
+
+@contextmanager
+def profile(path=None):
+    """
+    用 cProfile 记录代码块，path 为 None 时不做任何事。
+    :param path: .prof 输出路径
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"性能分析数据已保存到：{path}")